@@ -3,12 +3,22 @@ Configuration management for AZW3 pipeline.
 Stack-agnostic configuration system.
 """
 
+import copy
 import os
 import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 from pydantic import BaseModel, Field
 
+try:
+    # libyaml-backed loader; PyYAML only ships it when built against libyaml
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# (mtime in ns, parsed YAML) by resolved path; replaced when the file changes
+_yaml_cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
 
 class IngestionConfig(BaseModel):
     """Ingestion source configuration."""
@@ -23,6 +33,11 @@ class StorageConfig(BaseModel):
     bucket: Optional[str] = None
     region: Optional[str] = None
     connection_string: Optional[str] = None
+    format: str = Field(default="json")
+    sync_fallback: bool = False
+    driver: Optional[str] = None
+    pool_max: Optional[int] = None
+    s3_workers: Optional[int] = None
 
 
 class MedallionConfig(BaseModel):
@@ -54,15 +69,23 @@ class Config(BaseModel):
         if not path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}")
         
-        with open(path, "r") as f:
-            data = yaml.safe_load(f)
+        key = str(path.resolve())
+        mtime = path.stat().st_mtime_ns
+        cached = _yaml_cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            data = cached[1]
+        else:
+            with open(path, "r") as f:
+                data = yaml.load(f, Loader=_YamlLoader)
+            _yaml_cache[key] = (mtime, data)
         
-        return cls(**data)
+        # Copy so callers mutating the returned config never touch the cache
+        return cls.model_validate(copy.deepcopy(data))
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Config":
         """Create configuration from dictionary."""
-        return cls(**data)
+        return cls.model_validate(data)
     
     @classmethod
     def from_env(cls) -> "Config":
@@ -3,18 +3,61 @@ Data ingestion modules for multiple sources.
 """
 
 import asyncio
+import json
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from abc import ABC, abstractmethod
+import aiohttp
 from .config import IngestionConfig
 from .layers import BronzeLayer
 
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
 logger = logging.getLogger(__name__)
 
 
+class RateLimiter:
+    """Token-bucket rate limiter for outbound HTTP requests."""
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+    
+    async def acquire(self):
+        """Wait until a request token is available."""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
 class IngestionSource(ABC):
     """Base class for ingestion sources."""
     
+    _is_running = False
+    # Bumped whenever the running state changes
+    status_version = 0
+    
+    @property
+    def _running(self) -> bool:
+        return self._is_running
+    
+    @_running.setter
+    def _running(self, value: bool):
+        if value != self._is_running:
+            self._is_running = value
+            self.status_version += 1
+    
     @abstractmethod
     async def start(self):
         """Start ingestion."""
@@ -29,30 +72,75 @@ class IngestionSource(ABC):
     async def ingest(self) -> List[Dict[str, Any]]:
         """Ingest data."""
         pass
+    
+    def _start_task(self, coro, name: str) -> asyncio.Task:
+        """Start a background task owned by this source."""
+        task = asyncio.create_task(coro, name=name)
+        task.add_done_callback(self._on_task_exit)
+        self._tasks.append(task)
+        return task
+    
+    def _on_task_exit(self, task: asyncio.Task):
+        """Log unexpected task terminations and mark the source as stopped."""
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            logger.error(f"Ingestion task {task.get_name()} terminated: {exc}", exc_info=exc)
+            self._running = False
+    
+    async def _cancel_tasks(self):
+        """Cancel this source's background tasks and wait for them to finish."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
 
 
 class WebSocketIngestion(IngestionSource):
-    """Real-time WebSocket ingestion."""
+    """
+    Real-time WebSocket ingestion.
+    
+    A batch Bronze refuses is held and retried with exponential backoff;
+    stop() stores whatever is still held or queued and raises if Bronze
+    refuses it.
+    """
     
-    def __init__(self, endpoint: str, bronze_layer: BronzeLayer):
+    _RETRY_INITIAL_DELAY = 1.0
+    _RETRY_MAX_DELAY = 30.0
+    
+    def __init__(
+        self,
+        endpoint: str,
+        bronze_layer: BronzeLayer,
+        queue_size: int = 10000,
+        batch_size: int = 1000,
+    ):
         self.endpoint = endpoint
         self.bronze_layer = bronze_layer
+        self.queue_size = queue_size
+        self.batch_size = batch_size
         self._running = False
         self._ws = None
+        self._queue: Optional[asyncio.Queue] = None
+        # Messages taken from the queue but not yet accepted by Bronze
+        self._held: List[Dict[str, Any]] = []
+        self._tasks: List[asyncio.Task] = []
     
     async def start(self):
         """Start WebSocket connection."""
+        if websockets is None:
+            raise ImportError("websockets not installed. Install with: pip install websockets")
+        
         try:
-            import websockets
             self._ws = await websockets.connect(self.endpoint)
             self._running = True
             logger.info(f"WebSocket connected to {self.endpoint}")
             
-            # Start listening
-            asyncio.create_task(self._listen())
-        except ImportError:
-            logger.error("websockets library not installed. Install with: pip install websockets")
-            raise
+            # Start listening; the queue is created here so it binds to the running loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._start_task(self._listen(), name=f"ws-listen-{self.endpoint}")
+            self._start_task(self._drain(), name=f"ws-drain-{self.endpoint}")
         except Exception as e:
             logger.error(f"Failed to connect WebSocket: {e}")
             raise
@@ -60,24 +148,53 @@ class WebSocketIngestion(IngestionSource):
     async def stop(self):
         """Stop WebSocket connection."""
         self._running = False
-        if self._ws:
-            await self._ws.close()
+        await self._cancel_tasks()
+        
+        try:
+            # Store held messages and those still waiting in the queue
+            if self._queue is not None:
+                while not self._queue.empty():
+                    self._held.append(self._queue.get_nowait())
+            if self._held:
+                await self.bronze_layer.store_many(self._held)
+                self._held = []
+        finally:
+            if self._ws:
+                await self._ws.close()
         logger.info("WebSocket disconnected")
     
     async def _listen(self):
-        """Listen for WebSocket messages."""
+        """Listen for WebSocket messages and queue them for storage."""
         while self._running:
             try:
                 message = await self._ws.recv()
                 data = await self._parse_message(message)
-                await self.bronze_layer.store(data)
+                # Blocks when the queue is full, applying back-pressure to the socket
+                await self._queue.put(data)
             except Exception as e:
                 logger.error(f"WebSocket error: {e}")
                 await asyncio.sleep(1)
     
+    async def _drain(self):
+        """Drain queued messages into the Bronze layer in batches."""
+        delay = self._RETRY_INITIAL_DELAY
+        while self._running:
+            try:
+                if not self._held:
+                    self._held = [await self._queue.get()]
+                    while len(self._held) < self.batch_size and not self._queue.empty():
+                        self._held.append(self._queue.get_nowait())
+                await self.bronze_layer.store_many(self._held)
+                self._held = []
+                delay = self._RETRY_INITIAL_DELAY
+            except Exception as e:
+                logger.error(f"Error storing {len(self._held)} WebSocket messages: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self._RETRY_MAX_DELAY)
+    
     async def _parse_message(self, message: str) -> Dict[str, Any]:
         """Parse WebSocket message."""
-        import json
+        # The stdlib decoder keeps integers wider than 64 bits (e.g. wei amounts) exact
         return json.loads(message)
     
     async def ingest(self) -> List[Dict[str, Any]]:
@@ -88,48 +205,225 @@ class WebSocketIngestion(IngestionSource):
 class HistoricalIngestion(IngestionSource):
     """Historical block ingestion."""
     
-    def __init__(self, endpoint: str, start_block: int, bronze_layer: BronzeLayer):
+    def __init__(
+        self,
+        endpoint: str,
+        start_block: int,
+        bronze_layer: BronzeLayer,
+        concurrency: int = 64,
+        max_retries: int = 3,
+        rate_limit: Optional[float] = None,
+    ):
         self.endpoint = endpoint
         self.start_block = start_block
         self.bronze_layer = bronze_layer
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self._rate_limiter = RateLimiter(rate_limit) if rate_limit else None
         self._current_block = start_block
         self._running = False
+        self._session: Optional[aiohttp.ClientSession] = None
+        # In-flight fetches keyed by block number, at most `concurrency` ahead of _current_block
+        self._inflight: Dict[int, asyncio.Task] = {}
+        # Latest block known to exist; None until the chain head is first reached
+        self._head_block: Optional[int] = None
+        self._tasks: List[asyncio.Task] = []
     
     async def start(self):
         """Start historical ingestion."""
+        self._open_session()
         self._running = True
         logger.info(f"Starting historical ingestion from block {self.start_block}")
-        asyncio.create_task(self._ingest_blocks())
+        self._start_task(self._ingest_blocks(), name=f"historical-{self.endpoint}")
     
     async def stop(self):
         """Stop historical ingestion."""
         self._running = False
+        await self._cancel_tasks()
+        self._cancel_inflight()
+        if self._session:
+            await self._session.close()
+            self._session = None
         logger.info("Historical ingestion stopped")
     
+    def _open_session(self):
+        """Open one pooled keep-alive session for all RPC calls."""
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=self.concurrency, keepalive_timeout=60)
+        )
+    
+    async def ingest_range(self, start_block: int, end_block: int) -> Tuple[int, int]:
+        """Ingest blocks [start_block, end_block) once, in order.
+        
+        Returns the number of blocks and of transaction records stored.
+        """
+        owns_session = self._session is None
+        if owns_session:
+            self._open_session()
+        
+        stored = 0
+        records = 0
+        try:
+            for window_start in range(start_block, end_block, self.concurrency):
+                window = range(window_start, min(window_start + self.concurrency, end_block))
+                blocks = await asyncio.gather(*(self._fetch_block_with_retry(n) for n in window))
+                
+                # Stop at the first missing block (chain head) to keep Bronze in order
+                batch = []
+                for block_data in blocks:
+                    if not block_data:
+                        break
+                    batch.append(block_data)
+                
+                if batch:
+                    records += await self._store_blocks(batch)
+                    stored += len(batch)
+                if len(batch) < len(window):
+                    break
+        finally:
+            if owns_session:
+                await self._session.close()
+                self._session = None
+        
+        return stored, records
+    
     async def _ingest_blocks(self):
-        """Ingest blocks sequentially."""
+        """Ingest blocks with a window of concurrent fetches, stored in block order.
+        
+        Once the chain head has been reached, the window only covers blocks up
+        to the head reported by eth_blockNumber, so polling at the head sends
+        no speculative fetches for blocks that do not exist yet.
+        """
         while self._running:
             try:
-                block_data = await self._fetch_block(self._current_block)
-                if block_data:
-                    await self.bronze_layer.store(block_data)
-                    self._current_block += 1
-                else:
-                    # No more blocks or error
+                window_end = self._current_block + self.concurrency
+                if self._head_block is not None:
+                    if self._current_block > self._head_block:
+                        self._head_block = await self._fetch_block_number()
+                        if self._current_block > self._head_block:
+                            await asyncio.sleep(5)
+                            continue
+                    window_end = min(window_end, self._head_block + 1)
+                
+                # Keep the fetch window ahead of the commit pointer full
+                for block_number in range(self._current_block, window_end):
+                    if block_number not in self._inflight:
+                        self._inflight[block_number] = asyncio.create_task(
+                            self._fetch_block_with_retry(block_number)
+                        )
+                
+                # Wait for the next block, then take any consecutive blocks already fetched
+                batch = []
+                cursor = self._current_block
+                try:
+                    block_data = await self._inflight[cursor]
+                except Exception:
+                    # Fetched again on the next pass
+                    del self._inflight[cursor]
+                    raise
+                while block_data:
+                    batch.append(block_data)
+                    cursor += 1
+                    task = self._inflight.get(cursor)
+                    if task is None or not task.done() or task.cancelled() or task.exception():
+                        break
+                    block_data = task.result()
+                
+                # Advance only once stored; after a failed store the same blocks are retried
+                if batch:
+                    await self._store_blocks(batch)
+                for block_number in range(self._current_block, cursor):
+                    del self._inflight[block_number]
+                self._current_block = cursor
+                
+                if not block_data:
+                    # Reached the chain head; drop the speculative fetches and wait
+                    self._cancel_inflight()
+                    self._head_block = self._current_block - 1
                     await asyncio.sleep(5)
             except Exception as e:
                 logger.error(f"Error ingesting block {self._current_block}: {e}")
                 await asyncio.sleep(1)
     
+    async def _store_blocks(self, blocks: List[Dict[str, Any]]) -> int:
+        """Store the transactions of fetched blocks in Bronze, in block order.
+        
+        Returns the number of records stored.
+        """
+        records = [record for block in blocks for record in self._block_records(block)]
+        if records:
+            await self.bronze_layer.store_many(records)
+        return len(records)
+    
+    @staticmethod
+    def _block_records(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Flatten a block into one record per transaction."""
+        block_number = int(block["number"], 16)
+        timestamp = int(block["timestamp"], 16)
+        return [
+            {
+                "block_number": block_number,
+                "transaction_hash": tx["hash"],
+                "timestamp": timestamp,
+                "from": tx.get("from"),
+                "to": tx.get("to"),
+                "value": int(tx.get("value", "0x0"), 16),
+                # Gas limit; the gas actually used is only in the receipt
+                "gas_used": int(tx.get("gas", "0x0"), 16),
+                "gas_price": int(tx.get("gasPrice", "0x0"), 16),
+            }
+            for tx in block.get("transactions", [])
+        ]
+    
+    def _cancel_inflight(self):
+        """Cancel all in-flight block fetches."""
+        for task in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+    
+    async def _fetch_block_with_retry(self, block_number: int) -> Optional[Dict[str, Any]]:
+        """Fetch a block, retrying with exponential backoff (e.g. on rate limiting)."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._fetch_block(block_number)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = 0.5 * 2 ** attempt
+                logger.debug(f"Retrying block {block_number} in {delay}s: {e}")
+                await asyncio.sleep(delay)
+    
     async def _fetch_block(self, block_number: int) -> Optional[Dict[str, Any]]:
         """Fetch block data from RPC endpoint."""
-        # Placeholder for RPC call
-        # In production, this would use web3.py or similar
-        return {
-            "block_number": block_number,
-            "transaction_hash": f"0x{block_number:064x}",
-            "timestamp": 1234567890,
+        # Block with full transaction objects, or None past the chain head
+        return await self._rpc_call(
+            "eth_getBlockByNumber", [hex(block_number), True], f"block {block_number}"
+        )
+    
+    async def _fetch_block_number(self) -> int:
+        """Fetch the number of the latest block from RPC endpoint."""
+        return int(await self._rpc_call("eth_blockNumber", [], "latest block number"), 16)
+    
+    async def _rpc_call(self, method: str, params: List[Any], subject: str) -> Any:
+        """Send one JSON-RPC request and return its result."""
+        if self._rate_limiter:
+            await self._rate_limiter.acquire()
+        
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": method,
+            "params": params,
         }
+        async with self._session.post(self.endpoint, json=payload) as response:
+            # Raises on HTTP 429 and other errors; retried by _fetch_block_with_retry
+            response.raise_for_status()
+            body = await response.json()
+        
+        if body.get("error"):
+            raise RuntimeError(f"RPC error for {subject}: {body['error']}")
+        
+        return body.get("result")
     
     async def ingest(self) -> List[Dict[str, Any]]:
         """Ingest data (handled by _ingest_blocks)."""
@@ -139,20 +433,37 @@ class HistoricalIngestion(IngestionSource):
 class APIIngestion(IngestionSource):
     """Off-chain API ingestion."""
     
-    def __init__(self, provider: str, bronze_layer: BronzeLayer):
+    def __init__(
+        self,
+        provider: str,
+        bronze_layer: BronzeLayer,
+        endpoint: Optional[str] = None,
+        rate_limit: Optional[float] = None,
+    ):
         self.provider = provider
         self.bronze_layer = bronze_layer
+        self.endpoint = endpoint
+        self._rate_limiter = RateLimiter(rate_limit) if rate_limit else None
         self._running = False
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._tasks: List[asyncio.Task] = []
     
     async def start(self):
         """Start API ingestion."""
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(keepalive_timeout=60)
+        )
         self._running = True
         logger.info(f"Starting API ingestion from {self.provider}")
-        asyncio.create_task(self._poll_api())
+        self._start_task(self._poll_api(), name=f"api-{self.provider}")
     
     async def stop(self):
         """Stop API ingestion."""
         self._running = False
+        await self._cancel_tasks()
+        if self._session:
+            await self._session.close()
+            self._session = None
         logger.info("API ingestion stopped")
     
     async def _poll_api(self):
@@ -169,12 +480,25 @@ class APIIngestion(IngestionSource):
     
     async def _fetch_api_data(self) -> Optional[Dict[str, Any]]:
         """Fetch data from API."""
-        # Placeholder for API call
-        # In production, this would use aiohttp or similar
+        if not self.endpoint:
+            # Placeholder until a provider endpoint is configured
+            return {
+                "source": "api",
+                "provider": self.provider,
+                "data": {},
+            }
+        
+        if self._rate_limiter:
+            await self._rate_limiter.acquire()
+        
+        async with self._session.get(self.endpoint) as response:
+            response.raise_for_status()
+            data = await response.json()
+        
         return {
             "source": "api",
             "provider": self.provider,
-            "data": {},
+            "data": data,
         }
     
     async def ingest(self) -> List[Dict[str, Any]]:
@@ -182,6 +506,57 @@ class APIIngestion(IngestionSource):
         return []
 
 
+SourceFactory = Callable[[Dict[str, Any], BronzeLayer, IngestionConfig], IngestionSource]
+
+# Source `type` name (lower-case) -> factory building the source from its config
+SOURCE_REGISTRY: Dict[str, SourceFactory] = {}
+
+
+def register_source(source_type: str) -> Callable[[SourceFactory], SourceFactory]:
+    """Register an ingestion source factory for a config `type` name."""
+    def decorator(factory: SourceFactory) -> SourceFactory:
+        SOURCE_REGISTRY[source_type.lower()] = factory
+        return factory
+    return decorator
+
+
+@register_source("websocket")
+def _websocket_source(
+    source_config: Dict[str, Any], bronze_layer: BronzeLayer, config: IngestionConfig
+) -> IngestionSource:
+    return WebSocketIngestion(
+        source_config.get("endpoint", ""),
+        bronze_layer,
+        batch_size=config.batch_size,
+    )
+
+
+@register_source("historical")
+def _historical_source(
+    source_config: Dict[str, Any], bronze_layer: BronzeLayer, config: IngestionConfig
+) -> IngestionSource:
+    return HistoricalIngestion(
+        source_config.get("endpoint", ""),
+        source_config.get("start_block", 0),
+        bronze_layer,
+        concurrency=source_config.get("concurrency", 64),
+        max_retries=config.max_retries,
+        rate_limit=source_config.get("rate_limit"),
+    )
+
+
+@register_source("api")
+def _api_source(
+    source_config: Dict[str, Any], bronze_layer: BronzeLayer, config: IngestionConfig
+) -> IngestionSource:
+    return APIIngestion(
+        source_config.get("provider", ""),
+        bronze_layer,
+        endpoint=source_config.get("endpoint"),
+        rate_limit=source_config.get("rate_limit"),
+    )
+
+
 class IngestionManager:
     """Manages multiple ingestion sources."""
     
@@ -196,45 +571,39 @@ class IngestionManager:
         for source_config in self.config.sources:
             source_type = source_config.get("type", "").lower()
             
-            if source_type == "websocket":
-                source = WebSocketIngestion(
-                    source_config.get("endpoint", ""),
-                    self.bronze_layer
-                )
-            elif source_type == "historical":
-                source = HistoricalIngestion(
-                    source_config.get("endpoint", ""),
-                    source_config.get("start_block", 0),
-                    self.bronze_layer
-                )
-            elif source_type == "api":
-                source = APIIngestion(
-                    source_config.get("provider", ""),
-                    self.bronze_layer
-                )
-            else:
+            factory = SOURCE_REGISTRY.get(source_type)
+            if factory is None:
                 logger.warning(f"Unknown source type: {source_type}")
                 continue
             
-            self.sources.append(source)
+            self.sources.append(factory(source_config, self.bronze_layer, self.config))
     
     async def start(self):
-        """Start all ingestion sources."""
+        """Start all ingestion sources concurrently."""
         logger.info(f"Starting {len(self.sources)} ingestion sources")
-        for source in self.sources:
-            try:
-                await source.start()
-            except Exception as e:
-                logger.error(f"Failed to start source: {e}")
+        results = await asyncio.gather(
+            *(source.start() for source in self.sources),
+            return_exceptions=True,
+        )
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to start source {type(source).__name__}: {result}")
     
     async def stop(self):
-        """Stop all ingestion sources."""
+        """Stop all ingestion sources concurrently."""
         logger.info("Stopping all ingestion sources")
-        for source in self.sources:
-            try:
-                await source.stop()
-            except Exception as e:
-                logger.error(f"Error stopping source: {e}")
+        results = await asyncio.gather(
+            *(source.stop() for source in self.sources),
+            return_exceptions=True,
+        )
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error stopping source {type(source).__name__}: {result}")
+    
+    @property
+    def status_version(self) -> int:
+        """Changes whenever get_status() would change."""
+        return sum(getattr(source, "status_version", 0) for source in self.sources)
     
     def get_status(self) -> Dict[str, Any]:
         """Get ingestion status."""
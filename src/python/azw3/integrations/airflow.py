@@ -3,18 +3,39 @@ Airflow DAG integration.
 """
 
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime, timedelta
+from ..pipeline import run_sync
 
 logger = logging.getLogger(__name__)
 
 
 class AirflowDAG:
-    """Airflow DAG wrapper for AZW3 pipeline."""
+    """
+    Airflow DAG wrapper for AZW3 pipeline.
     
-    def __init__(self, pipeline, schedule_interval: str = "@hourly"):
+    Each DAG run does a bounded amount of work: ingest one block range into
+    Bronze, then process that run's records Bronze → Silver and Silver → Gold
+    (record counts are passed between tasks via XCom). The block range
+    continues from the previous run, or can be set with
+    ``{"start_block": ..., "end_block": ...}`` in the run's conf. Only one
+    run is active at a time, so runs never ingest the same blocks or read
+    each other's records.
+    """
+    
+    def __init__(
+        self,
+        pipeline,
+        schedule_interval: str = "@hourly",
+        start_block: int = 0,
+        blocks_per_run: int = 1000,
+        dag_id: str = "azw3_pipeline",
+    ):
         self.pipeline = pipeline
         self.schedule_interval = schedule_interval
+        self.start_block = start_block
+        self.blocks_per_run = blocks_per_run
+        self.dag_id = dag_id
         self._dag = None
     
     def _get_dag(self):
@@ -35,25 +56,64 @@ class AirflowDAG:
                 }
                 
                 self._dag = DAG(
-                    "azw3_pipeline",
+                    self.dag_id,
                     default_args=default_args,
                     description="AZW3 Web3 Data Pipeline",
                     schedule_interval=self.schedule_interval,
                     catchup=False,
+                    max_active_runs=1,
                 )
                 
-                # Add pipeline task
-                run_pipeline = PythonOperator(
-                    task_id="run_pipeline",
-                    python_callable=self.pipeline.start_sync,
+                # One bounded unit of work per task
+                ingest_blocks = PythonOperator(
+                    task_id="ingest_blocks",
+                    python_callable=self._ingest_blocks_task,
+                    dag=self._dag,
+                )
+                bronze_to_silver = PythonOperator(
+                    task_id="bronze_to_silver",
+                    python_callable=self._bronze_to_silver_task,
+                    dag=self._dag,
+                )
+                silver_to_gold = PythonOperator(
+                    task_id="silver_to_gold",
+                    python_callable=self._silver_to_gold_task,
                     dag=self._dag,
                 )
                 
+                ingest_blocks >> bronze_to_silver >> silver_to_gold
+            
             except ImportError:
                 raise ImportError("apache-airflow not installed. Install with: pip install apache-airflow")
         return self._dag
     
+    def _ingest_blocks_task(self, **context) -> int:
+        """Ingest one block range; returns the next start block (pushed to XCom)."""
+        conf: Dict[str, Any] = context["dag_run"].conf or {}
+        previous_end: Optional[int] = context["ti"].xcom_pull(
+            task_ids="ingest_blocks", include_prior_dates=True
+        )
+        
+        start_block = conf.get(
+            "start_block", previous_end if previous_end is not None else self.start_block
+        )
+        end_block = conf.get("end_block", start_block + self.blocks_per_run)
+        
+        stored, records = run_sync(self.pipeline.ingest_blocks(start_block, end_block))
+        # Downstream tasks process exactly this run's records
+        context["ti"].xcom_push(key="records", value=records)
+        return start_block + stored
+    
+    def _bronze_to_silver_task(self, **context) -> int:
+        """Process this run's Bronze records into Silver; returns records stored."""
+        records = context["ti"].xcom_pull(task_ids="ingest_blocks", key="records") or 0
+        return run_sync(self.pipeline.process_bronze_batch(records))
+    
+    def _silver_to_gold_task(self, **context) -> int:
+        """Process this run's Silver records into Gold; returns features stored."""
+        records = context["ti"].xcom_pull(task_ids="bronze_to_silver") or 0
+        return run_sync(self.pipeline.process_silver_batch(records))
+    
     def get_dag(self):
         """Get the Airflow DAG object."""
         return self._get_dag()
-
@@ -11,16 +11,24 @@ logger = logging.getLogger(__name__)
 class MLflowFeatureStore:
     """MLflow feature store integration."""
     
+    # Experiment IDs resolved so far, shared by all instances in the process
+    _EXPERIMENT_IDS: Dict[str, str] = {}
+    
     def __init__(self, experiment_name: str = "azw3-features"):
         self.experiment_name = experiment_name
         self._client = None
+        self._experiment_id: Optional[str] = None
     
     def _get_client(self):
         """Get MLflow client (lazy initialization)."""
         if self._client is None:
             try:
                 import mlflow
-                mlflow.set_experiment(self.experiment_name)
+                experiment_id = self._EXPERIMENT_IDS.get(self.experiment_name)
+                if experiment_id is None:
+                    experiment_id = mlflow.set_experiment(self.experiment_name).experiment_id
+                    self._EXPERIMENT_IDS[self.experiment_name] = experiment_id
+                self._experiment_id = experiment_id
                 self._client = mlflow
             except ImportError:
                 raise ImportError("mlflow not installed. Install with: pip install mlflow")
@@ -30,7 +38,7 @@ class MLflowFeatureStore:
         """Log features to MLflow."""
         mlflow = self._get_client()
         
-        with mlflow.start_run(run_id=run_id):
+        with mlflow.start_run(run_id=run_id, experiment_id=self._experiment_id):
             for key, value in features.items():
                 if isinstance(value, (int, float)):
                     mlflow.log_metric(key, value)
@@ -2,13 +2,98 @@
 Medallion Architecture layers: Bronze, Silver, Gold.
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import time
+from typing import List, Dict, Any, Optional, ClassVar, FrozenSet, Set, Coroutine
+import numpy as np
 from .storage import StorageBackend
 
 logger = logging.getLogger(__name__)
 
+_SECONDS_PER_HOUR = 3600
+_SECONDS_PER_DAY = 86400
+
+# The Unix epoch (1970-01-01) was a Thursday, i.e. weekday() == 3.
+_EPOCH_WEEKDAY = 3
+
+
+def _now_ms() -> int:
+    """Return the current Unix time in integer milliseconds."""
+    return time.time_ns() // 1_000_000
+
+
+class _BackgroundWriter:
+    """
+    Buffers a layer's records and runs its storage writes as background tasks.
+    
+    Flushing swaps out the full buffer and writes it while the producer keeps
+    filling a fresh one (double-buffering). At most `_max_pending_writes`
+    writes are in flight; beyond that, flushing waits for one to finish.
+    Subclasses set `_layer_name` and `_record_kind` (used in log messages)
+    and initialize `_storage_write`, `_buffer`, `_buffer_size`,
+    `_pending_writes` and `status_version`.
+    """
+    
+    _max_pending_writes = 4
+    _layer_name: ClassVar[str]
+    _record_kind: ClassVar[str] = "records"
+    
+    async def store(self, data: List[Dict[str, Any]]):
+        """Buffer records, flushing once the buffer is full."""
+        self._buffer.extend(data)
+        self.status_version += 1
+        
+        if len(self._buffer) >= self._buffer_size:
+            await self._flush()
+    
+    async def _flush(self):
+        """Flush buffer to storage in the background."""
+        if not self._buffer:
+            return
+        
+        data, self._buffer = self._buffer, []
+        self.status_version += 1
+        await self._schedule_write(self._write(data))
+    
+    async def _write(self, data: List[Dict[str, Any]]):
+        """Write a swapped-out buffer, re-buffering it if the write fails."""
+        layer, kind = self._layer_name, self._record_kind
+        try:
+            await self._storage_write(layer, data)
+            logger.debug(f"Flushed {len(data)} {kind} to {layer.title()} layer")
+        except Exception as e:
+            logger.error(f"Failed to flush {len(data)} {kind} to {layer.title()} layer: {e}")
+            self._buffer.extend(data)
+            self.status_version += 1
+    
+    async def _schedule_write(self, write: Coroutine[Any, Any, None]):
+        """Run a storage write in the background."""
+        pending: Set[asyncio.Task] = self._pending_writes
+        if len(pending) >= self._max_pending_writes:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        
+        task = asyncio.create_task(write)
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    
+    async def close(self):
+        """Flush the buffer and wait for all background writes to finish.
+        
+        Records a failed write put back are written once more; raises if that
+        fails too, leaving them buffered.
+        """
+        await self._flush()
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes)
+        
+        if self._buffer:
+            data, self._buffer = self._buffer, []
+            self.status_version += 1
+            await self._write(data)
+            if self._buffer:
+                raise RuntimeError(f"{len(self._buffer)} {self._record_kind} could not be written")
+
 
 class BronzeLayer:
     """
@@ -16,53 +101,117 @@ class BronzeLayer:
     
     Stores raw, unprocessed blockchain data.
     Immutable, uncleaned, schema-on-read.
+    
+    Full buffers are handed to the storage backend's background write queue,
+    so ingestion never waits on storage latency. Failed background writes are
+    retried by the backend and reported by close(). A full buffer is handed
+    off before the next batch is taken; while the backend refuses it, it
+    stays buffered and store_many() raises without taking the new records,
+    so callers can hold on to them and retry.
     """
     
     def __init__(self, storage: StorageBackend, config: Dict[str, Any]):
         self.storage = storage
+        # Bound once so the write/read hot paths skip the attribute lookups
+        self._storage_write_columns_nowait = storage.write_columns_nowait
+        self._storage_read = storage.read
         self.config = config
         self.retention_days = config.get("retention_days", 365)
-        self._buffer: List[Dict[str, Any]] = []
+        # Column-oriented buffer: field name -> values, one slot per record
+        self._buffer: Dict[str, List[Any]] = {}
+        self._buffer_len = 0
         self._buffer_size = 1000
+        # Bumped whenever get_status() would change
+        self.status_version = 0
     
     async def store(self, data: Dict[str, Any]):
         """Store raw data in Bronze layer."""
-        # Add metadata
-        data["_bronze_metadata"] = {
-            "ingested_at": datetime.utcnow().isoformat(),
+        await self.store_many([data])
+    
+    async def store_many(self, records: List[Dict[str, Any]]):
+        """Store a batch of raw records in Bronze layer.
+        
+        Raises, without taking the records, while the backend refuses the full
+        buffer. The records are only taken after the last await, so a
+        cancelled call has not taken them either.
+        """
+        # Flush a full buffer first; raises while the backend keeps refusing it
+        if self._buffer_len >= self._buffer_size:
+            await self._flush()
+        
+        # One metadata dict shared by reference across the batch (read-only downstream)
+        metadata = {
+            "ingested_at_ms": _now_ms(),
             "layer": "bronze",
             "retention_days": self.retention_days,
         }
         
-        self._buffer.append(data)
+        append = self._append
+        for data in records:
+            data["_bronze_metadata"] = metadata
+            append(data)
+        self.status_version += 1
+    
+    def _append(self, data: Dict[str, Any]):
+        """Append a record to the column buffer, padding absent fields with None."""
+        buffer = self._buffer
+        count = self._buffer_len
         
-        # Flush buffer when full
-        if len(self._buffer) >= self._buffer_size:
-            await self._flush()
+        for key, value in data.items():
+            column = buffer.get(key)
+            if column is None:
+                column = buffer[key] = [None] * count
+            column.append(value)
+        
+        if len(data) != len(buffer):
+            for column in buffer.values():
+                if len(column) == count:
+                    column.append(None)
+        
+        self._buffer_len = count + 1
     
     async def _flush(self):
-        """Flush buffer to storage."""
-        if not self._buffer:
+        """Queue the buffer for a background write."""
+        if not self._buffer_len:
             return
         
-        await self.storage.write("bronze", self._buffer)
-        logger.debug(f"Flushed {len(self._buffer)} records to Bronze layer")
-        self._buffer.clear()
+        columns, count = self._buffer, self._buffer_len
+        self._buffer = {}
+        self._buffer_len = 0
+        self.status_version += 1
+        try:
+            await self._storage_write_columns_nowait("bronze", columns)
+        except BaseException:
+            # Refused, or cancelled while the write queue was full: keep the
+            # batch buffered, ahead of anything stored meanwhile
+            buffered = self._buffer
+            self._buffer, self._buffer_len = columns, count
+            names = list(buffered)
+            for values in zip(*buffered.values()):
+                self._append(dict(zip(names, values)))
+            self.status_version += 1
+            raise
+        logger.debug(f"Queued {count} records for Bronze layer")
+    
+    async def close(self):
+        """Flush the buffer and wait for queued writes to reach storage."""
+        await self._flush()
+        await self.storage.drain()
     
     async def get_next_batch(self, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
         """Get next batch of raw data for processing."""
-        return await self.storage.read("bronze", limit=limit)
+        return await self._storage_read("bronze", limit=limit)
     
     def get_status(self) -> Dict[str, Any]:
         """Get layer status."""
         return {
             "layer": "bronze",
-            "buffer_size": len(self._buffer),
+            "buffer_size": self._buffer_len,
             "retention_days": self.retention_days,
         }
 
 
-class SilverLayer:
+class SilverLayer(_BackgroundWriter):
     """
     Silver Layer: Cleaned & Normalized
     
@@ -72,33 +221,47 @@ class SilverLayer:
     - Structures into validated tables
     """
     
+    _layer_name = "silver"
+    
+    _REQUIRED_FIELDS: ClassVar[FrozenSet[str]] = frozenset(
+        {"block_number", "transaction_hash", "timestamp"}
+    )
+    
     def __init__(self, storage: StorageBackend, config: Dict[str, Any]):
         self.storage = storage
+        self._storage_write = storage.write
+        self._storage_read = storage.read
         self.config = config
         self.validation_mode = config.get("validation", "strict")
         self._buffer: List[Dict[str, Any]] = []
         self._buffer_size = 1000
+        self._pending_writes: Set[asyncio.Task] = set()
+        # Bumped whenever get_status() would change
+        self.status_version = 0
     
     async def process(self, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process raw data from Bronze layer."""
-        cleaned_data = []
-        
+        decoded_data = []
         for record in raw_data:
             try:
                 # Decode transaction data
-                decoded = await self._decode_transaction(record)
-                
-                # Validate
-                if self._validate(decoded):
-                    # Normalize structure
-                    normalized = self._normalize(decoded)
-                    cleaned_data.append(normalized)
+                decoded_data.append(await self._decode_transaction(record))
             except Exception as e:
                 logger.warning(f"Failed to process record: {e}")
                 if self.validation_mode == "strict":
                     raise
         
-        return cleaned_data
+        # One metadata dict shared by reference across the batch (read-only downstream)
+        metadata = {
+            "processed_at_ms": _now_ms(),
+            "layer": "silver",
+            "validation_mode": self.validation_mode,
+        }
+        
+        # Validate and normalize the whole batch in a single pass
+        validate = self._validate
+        normalize = self._normalize
+        return [normalize(decoded, metadata) for decoded in decoded_data if validate(decoded)]
     
     async def _decode_transaction(self, record: Dict[str, Any]) -> Dict[str, Any]:
         """Decode transaction using ABI if available."""
@@ -108,11 +271,10 @@ class SilverLayer:
     
     def _validate(self, data: Dict[str, Any]) -> bool:
         """Validate cleaned data."""
-        # Basic validation
-        required_fields = ["block_number", "transaction_hash", "timestamp"]
-        return all(field in data for field in required_fields)
+        # Basic validation: all required fields present (set subset test runs in C)
+        return self._REQUIRED_FIELDS <= data.keys()
     
-    def _normalize(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    def _normalize(self, data: Dict[str, Any], metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Normalize data structure."""
         normalized = {
             "block_number": data.get("block_number"),
@@ -123,33 +285,13 @@ class SilverLayer:
             "value": data.get("value"),
             "gas_used": data.get("gas_used"),
             "gas_price": data.get("gas_price"),
-            "_silver_metadata": {
-                "processed_at": datetime.utcnow().isoformat(),
-                "layer": "silver",
-                "validation_mode": self.validation_mode,
-            }
+            "_silver_metadata": metadata,
         }
         return normalized
     
-    async def store(self, data: List[Dict[str, Any]]):
-        """Store cleaned data in Silver layer."""
-        self._buffer.extend(data)
-        
-        if len(self._buffer) >= self._buffer_size:
-            await self._flush()
-    
-    async def _flush(self):
-        """Flush buffer to storage."""
-        if not self._buffer:
-            return
-        
-        await self.storage.write("silver", self._buffer)
-        logger.debug(f"Flushed {len(self._buffer)} records to Silver layer")
-        self._buffer.clear()
-    
     async def get_next_batch(self, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
         """Get next batch of cleaned data for processing."""
-        return await self.storage.read("silver", limit=limit)
+        return await self._storage_read("silver", limit=limit)
     
     def get_status(self) -> Dict[str, Any]:
         """Get layer status."""
@@ -160,7 +302,7 @@ class SilverLayer:
         }
 
 
-class GoldLayer:
+class GoldLayer(_BackgroundWriter):
     """
     Gold Layer: Feature Store Ready
     
@@ -170,83 +312,101 @@ class GoldLayer:
     - Financial features
     """
     
+    _layer_name = "gold"
+    _record_kind = "features"
+    
     def __init__(self, storage: StorageBackend, config: Dict[str, Any]):
         self.storage = storage
+        self._storage_write = storage.write
         self.config = config
         self.feature_store = config.get("feature_store", "feast")
         self._buffer: List[Dict[str, Any]] = []
         self._buffer_size = 1000
+        self._pending_writes: Set[asyncio.Task] = set()
+        # Bumped whenever get_status() would change
+        self.status_version = 0
     
     async def process(self, cleaned_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process cleaned data into ML features."""
-        features = []
+        if not cleaned_data:
+            return []
         
-        for record in cleaned_data:
-            # Extract temporal features
-            temporal_features = self._extract_temporal_features(record)
-            
-            # Extract financial features
-            financial_features = self._extract_financial_features(record)
-            
-            # Extract behavioral features
-            behavioral_features = await self._extract_behavioral_features(record)
-            
-            # Combine all features
-            feature_record = {
-                **temporal_features,
-                **financial_features,
-                **behavioral_features,
-                "_gold_metadata": {
-                    "processed_at": datetime.utcnow().isoformat(),
-                    "layer": "gold",
-                    "feature_store": self.feature_store,
-                }
-            }
-            
+        metadata = {
+            "processed_at_ms": _now_ms(),
+            "layer": "gold",
+            "feature_store": self.feature_store,
+        }
+        columns = self._to_columns(cleaned_data)
+        
+        # Extract features column-wise over the whole batch
+        feature_columns = {
+            **self._extract_temporal_features(columns),
+            **self._extract_financial_features(columns),
+            **await self._extract_behavioral_features(columns),
+        }
+        
+        # Convert back to records only at the edge
+        names = list(feature_columns)
+        values = [feature_columns[name].tolist() for name in names]
+        
+        features = []
+        for row in zip(*values):
+            feature_record = dict(zip(names, row))
+            feature_record["_gold_metadata"] = metadata
             features.append(feature_record)
         
         return features
     
-    def _extract_temporal_features(self, record: Dict[str, Any]) -> Dict[str, Any]:
-        """Extract time-series features."""
-        timestamp = record.get("timestamp")
+    def _to_columns(self, cleaned_data: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Build per-field NumPy columns from a batch of records."""
+        count = len(cleaned_data)
+        return {
+            "timestamp": np.fromiter(
+                (int(r.get("timestamp") or 0) for r in cleaned_data), dtype=np.int64, count=count
+            ),
+            "value": np.fromiter(
+                (float(r.get("value") or 0) for r in cleaned_data), dtype=np.float64, count=count
+            ),
+            "gas_used": np.fromiter(
+                (float(r.get("gas_used") or 0) for r in cleaned_data), dtype=np.float64, count=count
+            ),
+            "gas_price": np.fromiter(
+                (float(r.get("gas_price") or 0) for r in cleaned_data),
+                dtype=np.float64,
+                count=count,
+            ),
+        }
+    
+    def _extract_temporal_features(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Extract time-series features (UTC, Monday == 0)."""
+        timestamp = columns["timestamp"]
+        has_timestamp = timestamp != 0
+        hour_of_day = (timestamp // _SECONDS_PER_HOUR) % 24
+        day_of_week = (timestamp // _SECONDS_PER_DAY + _EPOCH_WEEKDAY) % 7
         return {
-            "hour_of_day": datetime.fromtimestamp(timestamp).hour if timestamp else None,
-            "day_of_week": datetime.fromtimestamp(timestamp).weekday() if timestamp else None,
-            "gas_price_avg": record.get("gas_price", 0),
+            "hour_of_day": np.where(has_timestamp, hour_of_day, None),
+            "day_of_week": np.where(has_timestamp, day_of_week, None),
+            "gas_price_avg": columns["gas_price"],
         }
     
-    def _extract_financial_features(self, record: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_financial_features(self, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
         """Extract financial features."""
         return {
-            "transaction_value": float(record.get("value", 0)),
-            "gas_cost": float(record.get("gas_used", 0)) * float(record.get("gas_price", 0)),
+            "transaction_value": columns["value"],
+            "gas_cost": columns["gas_used"] * columns["gas_price"],
         }
     
-    async def _extract_behavioral_features(self, record: Dict[str, Any]) -> Dict[str, Any]:
+    async def _extract_behavioral_features(
+        self, columns: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
         """Extract behavioral features."""
         # Placeholder for behavioral feature extraction
         # In production, this would aggregate user activity patterns
+        count = len(columns["timestamp"])
         return {
-            "user_activity_score": 0.5,  # Placeholder
+            "user_activity_score": np.full(count, 0.5),  # Placeholder
         }
     
-    async def store(self, features: List[Dict[str, Any]]):
-        """Store features in Gold layer."""
-        self._buffer.extend(features)
-        
-        if len(self._buffer) >= self._buffer_size:
-            await self._flush()
-    
-    async def _flush(self):
-        """Flush buffer to storage."""
-        if not self._buffer:
-            return
-        
-        await self.storage.write("gold", self._buffer)
-        logger.debug(f"Flushed {len(self._buffer)} features to Gold layer")
-        self._buffer.clear()
-    
     def get_status(self) -> Dict[str, Any]:
         """Get layer status."""
         return {
@@ -5,15 +5,58 @@ Orchestrates the entire data processing workflow.
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+import random
+import sys
+from typing import Optional, Dict, Any, List, Set, Callable, Awaitable, Coroutine, Tuple
 from .config import Config
 from .layers import BronzeLayer, SilverLayer, GoldLayer
-from .ingestion import IngestionManager
+from .ingestion import IngestionManager, HistoricalIngestion
 from .storage import StorageBackend, get_storage_backend
 
 logger = logging.getLogger(__name__)
 
 
+def run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Run a coroutine to completion, on uvloop's event loop when it is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    
+    logger.debug("Using uvloop event loop")
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    
+    uvloop.install()
+    return asyncio.run(coro)
+
+
+class _Backoff:
+    """Exponential retry delay with jitter, reset after a success."""
+    
+    def __init__(self, initial: float = 0.05, maximum: float = 30.0):
+        self.initial = initial
+        self.maximum = maximum
+        self._delay = initial
+    
+    def reset(self):
+        """Start again from the initial delay."""
+        self._delay = self.initial
+    
+    async def wait(self, stop: Optional[asyncio.Event] = None):
+        """Sleep for the current delay, then double it; returns early once `stop` is set."""
+        delay = self._delay + random.uniform(0, self._delay * 0.1)
+        self._delay = min(self._delay * 2, self.maximum)
+        if stop is None:
+            await asyncio.sleep(delay)
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+
 class Pipeline:
     """
     Main pipeline orchestrator.
@@ -22,6 +65,12 @@ class Pipeline:
     the Medallion Architecture (Bronze → Silver → Gold).
     """
     
+    # Batches buffered between the steps of a processing stage
+    _STAGE_QUEUE_SIZE = 4
+    
+    # Seconds to wait before polling a layer again when it had no data
+    _IDLE_POLL_INTERVAL = 0.1
+    
     def __init__(
         self,
         config: Optional[Config] = None,
@@ -57,6 +106,11 @@ class Pipeline:
         )
         
         self._running = False
+        self._processing: Optional[asyncio.Future] = None
+        self._stopping: Optional[asyncio.Event] = None
+        # Last status and the component versions it was built from
+        self._status: Dict[str, Any] = {}
+        self._status_versions: Optional[tuple] = None
         logger.info(f"Pipeline initialized for stack: {stack}")
     
     async def start(self):
@@ -66,6 +120,7 @@ class Pipeline:
             return
         
         self._running = True
+        self._stopping = asyncio.Event()
         logger.info("Starting AZW3 pipeline...")
         
         try:
@@ -73,70 +128,270 @@ class Pipeline:
             await self.ingestion.start()
             
             # Start processing layers
-            await asyncio.gather(
+            self._processing = asyncio.gather(
                 self._process_bronze_to_silver(),
                 self._process_silver_to_gold(),
             )
+            await self._processing
         except Exception as e:
             logger.error(f"Pipeline error: {e}", exc_info=True)
             raise
     
     def start_sync(self):
         """Start the pipeline synchronously."""
-        asyncio.run(self.start())
+        run_sync(self.start())
     
     async def stop(self):
         """Stop the pipeline."""
         self._running = False
+        if self._stopping is not None:
+            self._stopping.set()
         await self.ingestion.stop()
+        
+        # Let the processing stages drain their in-flight batches
+        if self._processing is not None:
+            await asyncio.wait([self._processing])
+            self._processing = None
+        
+        # Flush buffered records and wait for background writes; every step
+        # runs even if an earlier one fails, and the first error is raised
+        error: Optional[Exception] = None
+        for close in (
+            self.bronze.close,
+            self.silver.close,
+            self.gold.close,
+            self.storage.drain,
+            self.storage.close,
+        ):
+            try:
+                await close()
+            except Exception as e:
+                logger.error(f"Error stopping pipeline: {e}")
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
         logger.info("Pipeline stopped")
     
+    async def ingest_blocks(self, start_block: int, end_block: int) -> Tuple[int, int]:
+        """Ingest a bounded block range into Bronze, flush it and close storage.
+        
+        Storage is closed even if ingestion fails. Returns the number of
+        blocks and of Bronze records stored.
+        """
+        source = next(
+            (s for s in self.ingestion.sources if isinstance(s, HistoricalIngestion)),
+            None,
+        )
+        if source is None:
+            raise ValueError("No historical ingestion source configured")
+        
+        try:
+            stored, records = await source.ingest_range(start_block, end_block)
+            await self.bronze.close()
+        finally:
+            # Release clients bound to this run's event loop
+            await self.storage.close()
+        logger.info(f"Ingested {stored} blocks ({records} records) from {start_block} into Bronze")
+        return stored, records
+    
+    async def process_bronze_batch(self, limit: int = 100) -> int:
+        """Process the newest `limit` Bronze records into Silver.
+        
+        Flushes Silver and closes storage, even if processing fails; returns
+        the number of records stored.
+        """
+        if limit <= 0:
+            return 0
+        try:
+            raw_data = await self.bronze.get_next_batch(limit)
+            if not raw_data:
+                return 0
+            
+            cleaned_data = await self.silver.process(raw_data)
+            await self.silver.store(cleaned_data)
+            await self.silver.close()
+        finally:
+            # Release clients bound to this run's event loop
+            await self.storage.close()
+        logger.debug(f"Processed {len(cleaned_data)} records: Bronze → Silver")
+        return len(cleaned_data)
+    
+    async def process_silver_batch(self, limit: int = 100) -> int:
+        """Process the newest `limit` Silver records into Gold.
+        
+        Flushes Gold and closes storage, even if processing fails; returns
+        the number of features stored.
+        """
+        if limit <= 0:
+            return 0
+        try:
+            cleaned_data = await self.silver.get_next_batch(limit)
+            if not cleaned_data:
+                return 0
+            
+            features = await self.gold.process(cleaned_data)
+            await self.gold.store(features)
+            await self.gold.close()
+        finally:
+            # Release clients bound to this run's event loop
+            await self.storage.close()
+        logger.debug(f"Processed {len(features)} features: Silver → Gold")
+        return len(features)
+    
     async def _process_bronze_to_silver(self):
         """Process data from Bronze to Silver layer."""
-        while self._running:
-            try:
-                # Get raw data from Bronze
-                raw_data = await self.bronze.get_next_batch()
-                
-                if raw_data:
-                    # Transform to Silver
-                    cleaned_data = await self.silver.process(raw_data)
-                    
-                    # Store in Silver layer
-                    await self.silver.store(cleaned_data)
-                    
-                    logger.debug(f"Processed {len(cleaned_data)} records: Bronze → Silver")
-            except Exception as e:
-                logger.error(f"Error processing Bronze → Silver: {e}")
-                await asyncio.sleep(1)
+        await self._run_stage(
+            "Bronze → Silver",
+            self.bronze.get_next_batch,
+            self.silver.process,
+            self.silver.store,
+            concurrency=self.config.processing.silver.get("concurrency", 4),
+            prefetch=self.config.processing.silver.get("prefetch", self._STAGE_QUEUE_SIZE),
+        )
     
     async def _process_silver_to_gold(self):
         """Process data from Silver to Gold layer."""
+        await self._run_stage(
+            "Silver → Gold",
+            self.silver.get_next_batch,
+            self.gold.process,
+            self.gold.store,
+            concurrency=self.config.processing.gold.get("concurrency", 4),
+            prefetch=self.config.processing.gold.get("prefetch", self._STAGE_QUEUE_SIZE),
+        )
+    
+    async def _run_stage(
+        self,
+        name: str,
+        fetch: Callable[[], Awaitable[Optional[List[Dict[str, Any]]]]],
+        transform: Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]],
+        store: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+        concurrency: int = 4,
+        prefetch: int = _STAGE_QUEUE_SIZE,
+    ):
+        """Run a stage's fetch, transform and store steps concurrently.
+        
+        The steps are linked by bounded queues, so the next batch is fetched
+        while the previous one is transformed and stored; a full queue makes
+        the upstream step wait. The fetcher reads up to `prefetch` batches
+        ahead of the transformer, and up to `concurrency` batches are
+        transformed at once. A None sentinel shuts the steps down in order
+        once the pipeline stops.
+        """
+        # Created here so the queues bind to the running event loop
+        raw_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, prefetch))
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=self._STAGE_QUEUE_SIZE)
+        
+        await asyncio.gather(
+            self._stage_fetcher(name, fetch, raw_queue),
+            self._stage_transformer(name, transform, raw_queue, result_queue, max(1, concurrency)),
+            self._stage_storer(name, store, result_queue),
+        )
+    
+    async def _stage_fetcher(self, name: str, fetch, out_queue: asyncio.Queue):
+        """Fetch batches from the source layer until the pipeline stops."""
+        backoff = _Backoff()
         while self._running:
             try:
-                # Get cleaned data from Silver
-                cleaned_data = await self.silver.get_next_batch()
-                
-                if cleaned_data:
-                    # Transform to Gold (features)
-                    features = await self.gold.process(cleaned_data)
-                    
-                    # Store in Gold layer
-                    await self.gold.store(features)
-                    
-                    logger.debug(f"Processed {len(features)} features: Silver → Gold")
+                batch = await fetch()
+            except Exception as e:
+                logger.error(f"Error fetching batch for {name}: {e}")
+                await backoff.wait(self._stopping)
+                continue
+            
+            backoff.reset()
+            if batch:
+                await out_queue.put(batch)
+            else:
+                # Nothing to process yet; yield instead of spinning
+                await asyncio.sleep(self._IDLE_POLL_INTERVAL)
+        
+        await out_queue.put(None)
+    
+    async def _stage_transformer(
+        self,
+        name: str,
+        transform,
+        in_queue: asyncio.Queue,
+        out_queue: asyncio.Queue,
+        concurrency: int,
+    ):
+        """Transform fetched batches for the target layer, several at a time."""
+        backoff = _Backoff()
+        pending: Set[asyncio.Task] = set()
+        while True:
+            batch = await in_queue.get()
+            if batch is None:
+                break
+            
+            if len(pending) >= concurrency:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.create_task(
+                self._transform_batch(name, transform, batch, out_queue, backoff)
+            ))
+        
+        if pending:
+            await asyncio.wait(pending)
+        await out_queue.put(None)
+    
+    async def _transform_batch(
+        self,
+        name: str,
+        transform,
+        batch: List[Dict[str, Any]],
+        out_queue: asyncio.Queue,
+        backoff: _Backoff,
+    ):
+        """Transform one batch and queue the result for storage."""
+        try:
+            result = await transform(batch)
+        except Exception as e:
+            logger.error(f"Error processing {name}: {e}")
+            await backoff.wait(self._stopping)
+            return
+        
+        backoff.reset()
+        await out_queue.put(result)
+    
+    async def _stage_storer(self, name: str, store, in_queue: asyncio.Queue):
+        """Store transformed batches in the target layer."""
+        backoff = _Backoff()
+        while True:
+            result = await in_queue.get()
+            if result is None:
+                return
+            
+            try:
+                await store(result)
+                logger.debug(f"Processed {len(result)} records: {name}")
+                backoff.reset()
             except Exception as e:
-                logger.error(f"Error processing Silver → Gold: {e}")
-                await asyncio.sleep(1)
+                logger.error(f"Error storing {name}: {e}")
+                await backoff.wait(self._stopping)
     
     def get_status(self) -> Dict[str, Any]:
-        """Get pipeline status."""
-        return {
-            "running": self._running,
-            "stack": self.stack,
-            "ingestion": self.ingestion.get_status(),
-            "bronze": self.bronze.get_status(),
-            "silver": self.silver.get_status(),
-            "gold": self.gold.get_status(),
-        }
+        """Get pipeline status.
+        
+        Only the parts whose component changed are rebuilt; each call
+        returns a fresh copy of the cached top-level dict.
+        """
+        components = (
+            ("ingestion", self.ingestion),
+            ("bronze", self.bronze),
+            ("silver", self.silver),
+            ("gold", self.gold),
+        )
+        versions = tuple(component.status_version for _, component in components)
+        status = self._status
+        previous = self._status_versions
+        
+        status["running"] = self._running
+        status["stack"] = self.stack
+        if versions != previous:
+            for index, (name, component) in enumerate(components):
+                if previous is None or versions[index] != previous[index]:
+                    status[name] = component.get_status()
+            self._status_versions = versions
+        return dict(status)
 
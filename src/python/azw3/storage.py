@@ -3,105 +3,894 @@ Storage backends for different storage systems.
 Stack-agnostic storage abstraction.
 """
 
+import asyncio
+import functools
+import itertools
+import json
 import logging
+import os
+import random
+import secrets
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Type, ClassVar, Iterator
 from .config import StorageConfig
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 
+def _json_dumps(data: Any) -> bytes:
+    """Serialize to JSON bytes, with orjson when it is installed.
+    
+    orjson rejects integers wider than 64 bits (e.g. raw wei amounts), so those
+    batches go through the stdlib encoder instead.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass
+    return json.dumps(data).encode()
+
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _has_wide_int(value: Any) -> bool:
+    """Whether a value holds an integer outside the int64 range."""
+    if type(value) is int:
+        return not _INT64_MIN <= value <= _INT64_MAX
+    if isinstance(value, dict):
+        return any(map(_has_wide_int, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(_has_wide_int, value))
+    return False
+
+
+def _ints_to_str(value: Any, wide_only: bool = False) -> Any:
+    """Replace integers (only those outside int64 if `wide_only`) with decimal strings."""
+    if type(value) is int:
+        if wide_only and _INT64_MIN <= value <= _INT64_MAX:
+            return value
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _ints_to_str(item, wide_only) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_ints_to_str(item, wide_only) for item in value]
+    return value
+
+
+def _rows_from_columns(columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Transpose a column dict into records, omitting null cells."""
+    names = list(columns)
+    return [
+        {name: value for name, value in zip(names, values) if value is not None}
+        for values in zip(*columns.values())
+    ]
+
+
+@functools.lru_cache(maxsize=8)
+def _make_s3_client(region: str, max_pool_connections: int):
+    """Build a boto3 S3 client; backends in the same region share one."""
+    try:
+        import boto3
+        from botocore.config import Config as BotoConfig
+    except ImportError:
+        raise ImportError("boto3 not installed. Install with: pip install boto3")
+    return boto3.client(
+        "s3",
+        region_name=region,
+        config=BotoConfig(max_pool_connections=max_pool_connections),
+    )
+
+
+# Motor clients by connection string: [client, number of backends using it]
+_mongo_clients: Dict[Optional[str], List[Any]] = {}
+
+
+def _acquire_mongo_client(connection_string: Optional[str]):
+    """Get the shared motor client for a connection string."""
+    entry = _mongo_clients.get(connection_string)
+    if entry is None:
+        try:
+            from motor.motor_asyncio import AsyncIOMotorClient
+        except ImportError:
+            raise ImportError("motor not installed. Install with: pip install motor")
+        entry = _mongo_clients[connection_string] = [AsyncIOMotorClient(connection_string), 0]
+    entry[1] += 1
+    return entry[0]
+
+
+def _release_mongo_client(connection_string: Optional[str]):
+    """Drop one use of a shared motor client, closing it after the last."""
+    entry = _mongo_clients.get(connection_string)
+    if entry is None:
+        return
+    entry[1] -= 1
+    if entry[1] <= 0:
+        del _mongo_clients[connection_string]
+        entry[0].close()
+
+
+def _get_parquet():
+    """Get pyarrow modules (lazy import)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow not installed. Install with: pip install pyarrow")
+    return pa, pq
+
+
+class Serializer(ABC):
+    """Encodes record batches for storage backends that write whole objects."""
+    
+    extension: ClassVar[str]
+    content_type: ClassVar[str]
+    
+    @abstractmethod
+    def dumps(self, records: List[Dict[str, Any]]) -> bytes:
+        """Encode a batch of records."""
+        pass
+    
+    def dumps_columns(self, columns: Dict[str, List[Any]]) -> bytes:
+        """Encode a column-oriented batch."""
+        return self.dumps(_rows_from_columns(columns))
+    
+    def iter_dumps(self, records: List[Dict[str, Any]]) -> Iterator[bytes]:
+        """Encode a batch as a sequence of byte chunks."""
+        yield self.dumps(records)
+    
+    @abstractmethod
+    def loads(self, body: bytes, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Decode a batch, keeping at most `limit` records."""
+        pass
+
+
+class JsonSerializer(Serializer):
+    """JSON array of records."""
+    
+    extension = "json"
+    content_type = "application/json"
+    
+    def dumps(self, records: List[Dict[str, Any]]) -> bytes:
+        return _json_dumps(records)
+    
+    def iter_dumps(self, records: List[Dict[str, Any]]) -> Iterator[bytes]:
+        # One record at a time, so large batches are never held as one string
+        yield b"["
+        for index, record in enumerate(records):
+            if index:
+                yield b","
+            yield _json_dumps(record)
+        yield b"]"
+    
+    def loads(self, body: bytes, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        # The stdlib decoder keeps integers wider than 64 bits exact
+        return json.loads(body)[:limit]
+
+
+class MsgpackSerializer(Serializer):
+    """MessagePack array of records."""
+    
+    extension = "msgpack"
+    content_type = "application/msgpack"
+    
+    def _get_ormsgpack(self):
+        """Get ormsgpack module (lazy import)."""
+        try:
+            import ormsgpack
+        except ImportError:
+            raise ImportError("ormsgpack not installed. Install with: pip install ormsgpack")
+        return ormsgpack
+    
+    def dumps(self, records: List[Dict[str, Any]]) -> bytes:
+        ormsgpack = self._get_ormsgpack()
+        try:
+            return ormsgpack.packb(records)
+        except TypeError:
+            # Integers wider than 64 bits (e.g. raw wei amounts) become decimal strings
+            return ormsgpack.packb(_ints_to_str(records, wide_only=True))
+    
+    def loads(self, body: bytes, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self._get_ormsgpack().unpackb(body)[:limit]
+
+
+class ParquetSerializer(Serializer):
+    """zstd-compressed Parquet table; integers wider than 64 bits are stored as decimal strings."""
+    
+    extension = "parquet"
+    content_type = "application/vnd.apache.parquet"
+    
+    def dumps(self, records: List[Dict[str, Any]]) -> bytes:
+        pa, _ = _get_parquet()
+        try:
+            table = pa.Table.from_pylist(records)
+        except OverflowError:
+            # Fields holding integers wider than 64 bits are stored as decimal strings
+            wide = {
+                key
+                for record in records
+                for key, value in record.items()
+                if _has_wide_int(value)
+            }
+            table = pa.Table.from_pylist([
+                {
+                    key: _ints_to_str(value) if key in wide else value
+                    for key, value in record.items()
+                }
+                for record in records
+            ])
+        return self._write_table(table)
+    
+    def dumps_columns(self, columns: Dict[str, List[Any]]) -> bytes:
+        pa, _ = _get_parquet()
+        try:
+            table = pa.Table.from_pydict(columns)
+        except OverflowError:
+            table = pa.Table.from_pydict({
+                name: (
+                    [_ints_to_str(value) for value in values]
+                    if any(map(_has_wide_int, values))
+                    else values
+                )
+                for name, values in columns.items()
+            })
+        return self._write_table(table)
+    
+    def _write_table(self, table) -> bytes:
+        pa, pq = _get_parquet()
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, compression="zstd")
+        return sink.getvalue().to_pybytes()
+    
+    def loads(self, body: bytes, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        pa, pq = _get_parquet()
+        table = pq.read_table(pa.BufferReader(body))
+        if limit is not None:
+            table = table.slice(0, limit)
+        return _rows_from_columns(table.to_pydict())
+
+
+_SERIALIZERS: Dict[str, Type[Serializer]] = {
+    cls.extension: cls for cls in (JsonSerializer, MsgpackSerializer, ParquetSerializer)
+}
+
+
+def get_serializer(format: str) -> Serializer:
+    """Get the serializer for a storage format."""
+    try:
+        return _SERIALIZERS[format.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown storage format: {format}") from None
+
+
+class _ObjectKeys:
+    """
+    Object names of the form ``layer/YYYY/MM/DD/<run>-<seq>.<ext>``.
+    
+    The run part is the creation time of the instance in epoch milliseconds,
+    the process id and a random token, so names from instances created in the
+    same millisecond, in one process or several, never collide, and still
+    sort roughly in write order. The date prefix is only recomputed once an
+    hour.
+    """
+    
+    _REFRESH_INTERVAL = 3600.0
+    
+    def __init__(self):
+        self._run = f"{time.time_ns() // 1_000_000:013d}-{os.getpid()}-{secrets.token_hex(4)}"
+        self._seq = itertools.count()
+        self._date_prefix = ""
+        self._refresh_at = 0.0
+    
+    def next(self, layer: str, extension: str) -> str:
+        """Return the next unique key for a layer."""
+        now = time.monotonic()
+        if now >= self._refresh_at:
+            self._date_prefix = datetime.utcnow().strftime("%Y/%m/%d")
+            self._refresh_at = now + self._REFRESH_INTERVAL
+        return f"{layer}/{self._date_prefix}/{self._run}-{next(self._seq):012d}.{extension}"
+
+
+def _concat_columns(batches: List[Dict[str, List[Any]]]) -> Dict[str, List[Any]]:
+    """Concatenate column dicts, padding columns a batch lacks with None."""
+    merged: Dict[str, List[Any]] = {}
+    total = 0
+    for columns in batches:
+        count = len(next(iter(columns.values()), []))
+        for name, values in columns.items():
+            column = merged.get(name)
+            if column is None:
+                column = merged[name] = [None] * total
+            column.extend(values)
+        total += count
+        for column in merged.values():
+            if len(column) < total:
+                column.extend([None] * (total - len(column)))
+    return merged
+
+
 class StorageBackend(ABC):
-    """Base class for storage backends."""
+    """
+    Base class for storage backends.
+    
+    Besides the awaited write()/write_columns(), batches can be handed off with
+    write_nowait()/write_columns_nowait(): they are queued and written by a
+    background task, which merges whatever has queued up per layer into one
+    write. Batches whose background write failed are kept and retried by that
+    task with exponential backoff; queuing more raises while a queue's worth
+    of them is held. drain() waits for the queue to empty, retries what is
+    still held once more and raises if any of it fails.
+    """
+    
+    _WRITE_QUEUE_SIZE = 64
+    _COALESCE_BATCHES = 16
+    _RETRY_INITIAL_DELAY = 1.0
+    _RETRY_MAX_DELAY = 30.0
+    
+    _write_queue: Optional[asyncio.Queue] = None
+    _write_flusher: Optional[asyncio.Task] = None
+    _failed_writes: Optional[List[Tuple[str, bool, Any]]] = None
+    _write_error: Optional[Exception] = None
     
     @abstractmethod
     async def write(self, layer: str, data: List[Dict[str, Any]]):
         """Write data to storage."""
         pass
     
+    async def write_columns(self, layer: str, columns: Dict[str, List[Any]]):
+        """Write column-oriented data to storage.
+        
+        Backends without a native columnar format receive the records via write().
+        """
+        await self.write(layer, _rows_from_columns(columns))
+    
     @abstractmethod
     async def read(self, layer: str, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
         """Read data from storage."""
         pass
+    
+    async def write_nowait(self, layer: str, data: List[Dict[str, Any]]):
+        """Queue records for a background write."""
+        await self._enqueue_write(layer, False, data)
+    
+    async def write_columns_nowait(self, layer: str, columns: Dict[str, List[Any]]):
+        """Queue column-oriented data for a background write."""
+        await self._enqueue_write(layer, True, columns)
+    
+    async def _enqueue_write(self, layer: str, columnar: bool, payload: Any):
+        """Queue a batch, starting the background writer if needed.
+        
+        Waits only when the queue is full.
+        """
+        if self._write_flusher is None or self._write_flusher.done():
+            # Created here so the queue binds to the running event loop
+            self._write_queue = asyncio.Queue(maxsize=self._WRITE_QUEUE_SIZE)
+            self._write_flusher = asyncio.create_task(self._write_queued())
+        if self._failed_writes and len(self._failed_writes) >= self._WRITE_QUEUE_SIZE:
+            raise RuntimeError(
+                f"{len(self._failed_writes)} background writes failed; not queuing more"
+            ) from self._write_error
+        await self._write_queue.put((layer, columnar, payload))
+    
+    async def _write_queued(self):
+        """Write queued batches, merging those already waiting, until a None arrives.
+        
+        While failed batches are held, they are retried after a backoff delay
+        that doubles (with jitter) every time one of them fails again.
+        """
+        queue = self._write_queue
+        loop = asyncio.get_running_loop()
+        delay = self._RETRY_INITIAL_DELAY
+        retry_at = None
+        while True:
+            if not self._failed_writes:
+                delay = self._RETRY_INITIAL_DELAY
+                retry_at = None
+                item = await queue.get()
+            else:
+                if retry_at is None:
+                    retry_at = loop.time() + delay + random.uniform(0, delay * 0.1)
+                timeout = retry_at - loop.time()
+                if timeout <= 0:
+                    retry_at = None
+                    if not await self._retry_failed_writes():
+                        delay = min(delay * 2, self._RETRY_MAX_DELAY)
+                    continue
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    continue
+            
+            items = [item]
+            while item is not None and len(items) < self._COALESCE_BATCHES and not queue.empty():
+                item = queue.get_nowait()
+                items.append(item)
+            
+            try:
+                await self._write_merged([entry for entry in items if entry is not None])
+            finally:
+                for _ in items:
+                    queue.task_done()
+            if item is None:
+                return
+    
+    async def _write_merged(self, items: List[Tuple[str, bool, Any]]):
+        """Write queued batches as one write per layer and kind."""
+        groups: Dict[Tuple[str, bool], List[Any]] = {}
+        for layer, columnar, payload in items:
+            groups.setdefault((layer, columnar), []).append(payload)
+        
+        for (layer, columnar), payloads in groups.items():
+            try:
+                if columnar:
+                    await self.write_columns(layer, _concat_columns(payloads))
+                else:
+                    await self.write(layer, [record for batch in payloads for record in batch])
+            except Exception as e:
+                # Kept for the background writer and drain() to retry
+                logger.error(f"Background write of {len(payloads)} {layer} batches failed: {e}")
+                if self._failed_writes is None:
+                    self._failed_writes = []
+                self._failed_writes.extend((layer, columnar, payload) for payload in payloads)
+                self._write_error = e
+    
+    async def _retry_failed_writes(self) -> bool:
+        """Retry each held batch on its own, dropping those written; returns whether all were.
+        
+        Separately, so one bad batch cannot fail the others merged with it.
+        """
+        failed = self._failed_writes
+        for item in list(failed):
+            layer, columnar, payload = item
+            try:
+                if columnar:
+                    await self.write_columns(layer, payload)
+                else:
+                    await self.write(layer, payload)
+            except Exception as e:
+                self._write_error = e
+                continue
+            # By identity: payloads are not comparable cheaply
+            failed[:] = [entry for entry in failed if entry is not item]
+        
+        if failed:
+            logger.error(f"{len(failed)} background writes still failing: {self._write_error}")
+            return False
+        return True
+    
+    async def drain(self):
+        """Wait until all queued background writes are done, then stop the writer.
+        
+        Batches still held after a failed write are retried once more; raises
+        if any of them fail again.
+        """
+        flusher = self._write_flusher
+        if flusher is not None:
+            if not flusher.done():
+                # The writer finishes its current write and exits at the None
+                await self._write_queue.put(None)
+                await asyncio.wait([flusher])
+            self._write_flusher = None
+            self._write_queue = None
+        
+        if self._failed_writes and not await self._retry_failed_writes():
+            raise RuntimeError(
+                f"{len(self._failed_writes)} background writes failed"
+            ) from self._write_error
+    
+    async def flush(self):
+        """Persist any writes the backend is still batching."""
+        pass
+    
+    async def close(self):
+        """Flush pending writes and release backend resources."""
+        await self.flush()
 
 
 class S3Storage(StorageBackend):
-    """AWS S3 storage backend."""
+    """
+    AWS S3 storage backend.
+    
+    Writes are batched per layer and uploaded with aioboto3 once 1000 records
+    are pending or every 10 seconds, whichever comes first. After a failed
+    upload only the periodic flush retries, and writes raise while 4000 or
+    more records are waiting; a single large write is always accepted.
+    Objects are encoded in the configured ``format`` (json, msgpack or
+    parquet) and streamed into pooled 8 MB buffers; a batch that outgrows one
+    buffer is sent as a multipart upload, one part per buffer. Set
+    ``sync_fallback`` to upload each write directly with boto3 instead; those
+    uploads run on a thread pool of ``s3_workers`` threads (default 16).
+    """
+    
+    _FLUSH_RECORDS = 1000
+    _FLUSH_INTERVAL = 10.0
+    _MAX_PENDING_RECORDS = 4 * _FLUSH_RECORDS
+    _MULTIPART_THRESHOLD = 8 * 1024 * 1024
+    _BUFFER_POOL_SIZE = 4
+    _MAX_POOL_CONNECTIONS = 32
     
     def __init__(self, config: StorageConfig):
         self.config = config
         self.bucket = config.bucket
         self.region = config.region or "us-east-1"
         self._client = None
+        self._async_client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client_lock: Optional[asyncio.Lock] = None
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        # Last upload error per layer, cleared by the next successful upload
+        self._upload_errors: Dict[str, Exception] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        self.serializer = get_serializer(config.format)
+        self._keys = _ObjectKeys()
+        self._buf_pool: List[bytearray] = []
+        self._workers = config.s3_workers or 16
+        self._executor: Optional[ThreadPoolExecutor] = None
     
     def _get_client(self):
         """Get S3 client (lazy initialization)."""
         if self._client is None:
+            self._client = _make_s3_client(
+                self.region, max(self._MAX_POOL_CONNECTIONS, self._workers)
+            )
+        return self._client
+    
+    async def _get_async_client(self):
+        """Get aioboto3 S3 client (lazy initialization)."""
+        if self._async_client is None:
             try:
-                import boto3
-                self._client = boto3.client("s3", region_name=self.region)
+                import aioboto3
             except ImportError:
-                raise ImportError("boto3 not installed. Install with: pip install boto3")
-        return self._client
+                raise ImportError("aioboto3 not installed. Install with: pip install aioboto3")
+            if self._client_lock is None:
+                self._client_lock = asyncio.Lock()
+            # Concurrent first flushes must not each create a client
+            async with self._client_lock:
+                if self._async_client is None:
+                    exit_stack = AsyncExitStack()
+                    self._async_client = await exit_stack.enter_async_context(
+                        aioboto3.Session().client("s3", region_name=self.region)
+                    )
+                    self._exit_stack = exit_stack
+        return self._async_client
     
     async def write(self, layer: str, data: List[Dict[str, Any]]):
         """Write data to S3."""
-        import json
-        from datetime import datetime
+        if self.config.sync_fallback:
+            # Create the client here; boto3 client creation is not thread-safe
+            client = self._get_client()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="azw3-s3"
+                )
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._write_sync, client, layer, data
+            )
+            return
         
-        client = self._get_client()
-        key = f"{layer}/{datetime.utcnow().isoformat()}.json"
+        pending = self._pending.setdefault(layer, [])
+        error = self._upload_errors.get(layer)
+        if len(pending) >= self._MAX_PENDING_RECORDS:
+            # Back-pressure: the caller keeps the records and retries
+            raise RuntimeError(
+                f"S3 upload backlog for {layer} is full ({len(pending)} records pending)"
+            ) from error
+        pending.extend(data)
+        
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+        
+        # After a failed upload, only the periodic flusher retries the backlog
+        if len(pending) >= self._FLUSH_RECORDS and error is None:
+            try:
+                await self._flush_layer(layer)
+            except Exception as e:
+                logger.error(f"Failed to upload {layer} batch to S3: {e}")
+    
+    def _write_sync(self, client, layer: str, data: List[Dict[str, Any]]):
+        """Write data to S3 with a blocking boto3 call."""
+        key = self._keys.next(layer, self.serializer.extension)
         
-        # In production, this would be async
         client.put_object(
             Bucket=self.bucket,
             Key=key,
-            Body=json.dumps(data),
-            ContentType="application/json"
+            Body=self.serializer.dumps(data),
+            ContentType=self.serializer.content_type
         )
         
         logger.debug(f"Wrote {len(data)} records to S3: {key}")
     
+    async def _flush_periodically(self):
+        """Upload pending batches on a timer."""
+        while True:
+            await asyncio.sleep(self._FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to upload pending batches to S3: {e}")
+    
+    async def flush(self):
+        """Upload all pending batches."""
+        for layer in list(self._pending):
+            await self._flush_layer(layer)
+    
+    async def _flush_layer(self, layer: str):
+        """Upload one layer's pending records as a single object."""
+        records = self._pending.pop(layer, None)
+        if not records:
+            return
+        
+        key = self._keys.next(layer, self.serializer.extension)
+        
+        try:
+            client = await self._get_async_client()
+            await self._upload_chunks(client, key, self.serializer.iter_dumps(records))
+        except Exception as e:
+            # Put the records back in front of anything written meanwhile
+            self._pending[layer] = records + self._pending.get(layer, [])
+            self._upload_errors[layer] = e
+            raise
+        
+        self._upload_errors.pop(layer, None)
+        logger.debug(f"Wrote {len(records)} records to S3: {key}")
+    
+    async def _upload_chunks(self, client, key: str, chunks: Iterator[bytes]):
+        """Stream encoded chunks into part-sized buffers and upload them.
+        
+        Full buffers are sent as multipart parts without copying. Only the
+        filled tail of the last buffer is copied out, so the buffer itself
+        stays full-size and goes back to the pool.
+        """
+        part_size = self._MULTIPART_THRESHOLD
+        buf = self._buf_pool.pop() if self._buf_pool else bytearray(part_size)
+        view = memoryview(buf)
+        pos = 0
+        upload_id = None
+        parts = []
+        
+        try:
+            for chunk in chunks:
+                data = memoryview(chunk)
+                while len(data) > part_size - pos:
+                    room = part_size - pos
+                    view[pos:] = data[:room]
+                    data = data[room:]
+                    if upload_id is None:
+                        upload = await client.create_multipart_upload(
+                            Bucket=self.bucket, Key=key, ContentType=self.serializer.content_type
+                        )
+                        upload_id = upload["UploadId"]
+                    parts.append(
+                        await self._upload_part(client, key, upload_id, len(parts) + 1, buf)
+                    )
+                    pos = 0
+                view[pos:pos + len(data)] = data
+                pos += len(data)
+            
+            tail = bytes(view[:pos])
+            if upload_id is None:
+                await client.put_object(
+                    Bucket=self.bucket,
+                    Key=key,
+                    Body=tail,
+                    ContentType=self.serializer.content_type,
+                )
+                return
+            
+            parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, tail))
+            await client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+        except Exception:
+            if upload_id is not None:
+                await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        finally:
+            view.release()
+            if len(self._buf_pool) < self._BUFFER_POOL_SIZE:
+                self._buf_pool.append(buf)
+    
+    async def _upload_part(self, client, key: str, upload_id: str, number: int, body):
+        """Upload one part of a multipart upload."""
+        part = await client.upload_part(
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=number,
+            Body=body,
+        )
+        return {"ETag": part["ETag"], "PartNumber": number}
+    
+    async def close(self):
+        """Upload pending batches and close the async client."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        
+        try:
+            await self.flush()
+        finally:
+            try:
+                if self._exit_stack is not None:
+                    await self._exit_stack.aclose()
+            finally:
+                self._exit_stack = None
+                self._async_client = None
+                # Recreated by the next event loop that uses this backend
+                self._client_lock = None
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                    self._executor = None
+    
     async def read(self, layer: str, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
         """Read data from S3."""
-        import json
-        
         client = self._get_client()
         # Placeholder - in production would list and read objects
         return []
 
 
 class PostgreSQLStorage(StorageBackend):
-    """PostgreSQL storage backend."""
+    """
+    PostgreSQL storage backend.
+    
+    Uses an asyncpg connection pool and binary COPY by default; set
+    ``driver: psycopg2`` to use a psycopg2 connection pool from worker threads
+    instead, with each call in its own transaction. Each layer is written to
+    an existing table of the same name; nested values are stored as JSON text.
+    """
     
     def __init__(self, config: StorageConfig):
         self.config = config
         self.connection_string = config.connection_string
-        self._connection = None
+        self.driver = (config.driver or "asyncpg").lower()
+        self._connections = None
+        self._connections_lock = threading.Lock()
+        self._pool = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+    
+    def _get_connections(self):
+        """Get psycopg2 connection pool (lazy initialization, thread-safe)."""
+        try:
+            from psycopg2.pool import ThreadedConnectionPool
+        except ImportError:
+            raise ImportError("psycopg2 not installed. Install with: pip install psycopg2-binary")
+        with self._connections_lock:
+            if self._connections is None:
+                self._connections = ThreadedConnectionPool(
+                    1, self.config.pool_max or 20, self.connection_string
+                )
+            return self._connections
     
-    def _get_connection(self):
-        """Get database connection (lazy initialization)."""
-        if self._connection is None:
+    @contextmanager
+    def _transaction(self):
+        """Borrow a pooled psycopg2 connection for one transaction.
+        
+        Commits if the block succeeds and rolls back if it raises.
+        """
+        connections = self._get_connections()
+        conn = connections.getconn()
+        try:
+            with conn:
+                yield conn
+        finally:
+            connections.putconn(conn)
+    
+    async def _ensure_pool(self):
+        """Get asyncpg connection pool (lazy initialization)."""
+        if self._pool is None:
             try:
-                import psycopg2
-                self._connection = psycopg2.connect(self.connection_string)
+                import asyncpg
             except ImportError:
-                raise ImportError("psycopg2 not installed. Install with: pip install psycopg2-binary")
-        return self._connection
+                raise ImportError("asyncpg not installed. Install with: pip install asyncpg")
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            # Concurrent first writes must not each create a pool
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.connection_string,
+                        min_size=4,
+                        max_size=self.config.pool_max or 20,
+                    )
+        return self._pool
+    
+    @staticmethod
+    def _to_rows(data: List[Dict[str, Any]]):
+        """Convert records to a column list and value tuples."""
+        columns = list(dict.fromkeys(key for record in data for key in record))
+        rows = [
+            tuple(
+                json.dumps(value) if isinstance(value, (dict, list)) else value
+                for value in (record.get(column) for column in columns)
+            )
+            for record in data
+        ]
+        return columns, rows
     
     async def write(self, layer: str, data: List[Dict[str, Any]]):
         """Write data to PostgreSQL."""
-        # Placeholder - in production would use asyncpg or similar
-        logger.debug(f"Would write {len(data)} records to PostgreSQL {layer} table")
+        if not data:
+            return
+        
+        columns, rows = self._to_rows(data)
+        
+        if self.driver == "psycopg2":
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_psycopg2, layer, columns, rows)
+        else:
+            pool = await self._ensure_pool()
+            async with pool.acquire() as conn:
+                await conn.copy_records_to_table(layer, records=rows, columns=columns)
+        
+        logger.debug(f"Wrote {len(data)} records to PostgreSQL {layer} table")
+    
+    def _write_psycopg2(self, layer: str, columns: List[str], rows: List[tuple]):
+        """Insert rows with psycopg2 (blocking; run in an executor)."""
+        from psycopg2 import sql
+        from psycopg2.extras import execute_values
+        
+        query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+            sql.Identifier(layer),
+            sql.SQL(", ").join(map(sql.Identifier, columns)),
+        )
+        with self._transaction() as conn, conn.cursor() as cursor:
+            execute_values(cursor, query, rows)
     
     async def read(self, layer: str, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
         """Read data from PostgreSQL."""
-        # Placeholder
-        return []
+        if self.driver == "psycopg2":
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._read_psycopg2, layer, limit)
+        
+        pool = await self._ensure_pool()
+        async with pool.acquire() as conn:
+            # Layer names are internal constants, not user input
+            rows = await conn.fetch(f'SELECT * FROM "{layer}" LIMIT $1', limit)
+        return [dict(row) for row in rows]
+    
+    def _read_psycopg2(self, layer: str, limit: int) -> List[Dict[str, Any]]:
+        """Read rows with psycopg2 (blocking; run in an executor)."""
+        from psycopg2 import sql
+        from psycopg2.extras import RealDictCursor
+        
+        query = sql.SQL("SELECT * FROM {} LIMIT %s").format(sql.Identifier(layer))
+        with self._transaction() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    async def close(self):
+        """Close the connection pools."""
+        await super().close()
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        # Recreated by the next event loop that uses this backend
+        self._pool_lock = None
+        with self._connections_lock:
+            if self._connections is not None:
+                self._connections.closeall()
+                self._connections = None
 
 
 class MongoDBStorage(StorageBackend):
-    """MongoDB storage backend."""
+    """MongoDB storage backend (async via motor)."""
     
     def __init__(self, config: StorageConfig):
         self.config = config
@@ -111,21 +900,19 @@ class MongoDBStorage(StorageBackend):
     def _get_client(self):
         """Get MongoDB client (lazy initialization)."""
         if self._client is None:
-            try:
-                from pymongo import MongoClient
-                self._client = MongoClient(self.connection_string)
-            except ImportError:
-                raise ImportError("pymongo not installed. Install with: pip install pymongo")
+            self._client = _acquire_mongo_client(self.connection_string)
         return self._client
     
     async def write(self, layer: str, data: List[Dict[str, Any]]):
         """Write data to MongoDB."""
+        if not data:
+            return
+        
         client = self._get_client()
         db = client.get_database("azw3")
         collection = db.get_collection(layer)
         
-        # In production, this would be async
-        collection.insert_many(data)
+        await collection.insert_many(data, ordered=False)
         
         logger.debug(f"Wrote {len(data)} records to MongoDB {layer} collection")
     
@@ -135,68 +922,118 @@ class MongoDBStorage(StorageBackend):
         db = client.get_database("azw3")
         collection = db.get_collection(layer)
         
-        # In production, this would be async
         cursor = collection.find().limit(limit)
-        return list(cursor)
+        return await cursor.to_list(length=limit)
+    
+    async def close(self):
+        """Release the MongoDB client; it is closed once no backend uses it."""
+        await super().close()
+        if self._client is not None:
+            _release_mongo_client(self.connection_string)
+            self._client = None
 
 
 class FileStorage(StorageBackend):
     """Local file storage backend (for development/testing)."""
     
+    _WRITE_BUFFER_SIZE = 1 << 20
+    
     def __init__(self, config: StorageConfig):
         self.config = config
         self.base_path = config.connection_string or "./data"
-        import os
+        self.format = config.format.lower()
+        self.serializer = get_serializer(self.format)
+        self._keys = _ObjectKeys()
         os.makedirs(self.base_path, exist_ok=True)
     
     async def write(self, layer: str, data: List[Dict[str, Any]]):
         """Write data to file."""
-        import json
-        from datetime import datetime
-        from pathlib import Path
-        
-        path = Path(self.base_path) / layer
-        path.mkdir(parents=True, exist_ok=True)
-        
-        filename = path / f"{datetime.utcnow().isoformat()}.json"
-        with open(filename, "w") as f:
-            json.dump(data, f, indent=2)
-        
+        filename = self._write_file(layer, self.serializer.dumps(data))
         logger.debug(f"Wrote {len(data)} records to file: {filename}")
     
+    async def write_columns(self, layer: str, columns: Dict[str, List[Any]]):
+        """Write column-oriented data to file."""
+        filename = self._write_file(layer, self.serializer.dumps_columns(columns))
+        count = len(next(iter(columns.values()), []))
+        logger.debug(f"Wrote {count} records to file: {filename}")
+    
+    def _write_file(self, layer: str, body: bytes) -> Path:
+        """Write an encoded batch to a new file in the layer's directory."""
+        filename = Path(self.base_path) / self._keys.next(layer, self.serializer.extension)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Write beside the target and rename, so readers never see a partial file;
+        # "x" fails rather than share a temporary file with another writer
+        tmp = filename.with_name(f".{filename.name}.tmp")
+        with open(tmp, "xb", buffering=self._WRITE_BUFFER_SIZE) as f:
+            f.write(body)
+        os.replace(tmp, filename)
+        return filename
+    
     async def read(self, layer: str, limit: int = 100) -> Optional[List[Dict[str, Any]]]:
         """Read data from file."""
-        import json
-        from pathlib import Path
-        
         path = Path(self.base_path) / layer
         if not path.exists():
             return None
         
-        # Read most recent file
-        files = sorted(path.glob("*.json"), reverse=True)
+        # Newest files first, in any format; names sort by date directory,
+        # then write order
+        files = sorted(
+            [f for extension in _SERIALIZERS for f in path.glob(f"**/*.{extension}")],
+            key=lambda f: f.relative_to(path).as_posix(),
+            reverse=True,
+        )
         if not files:
             return None
         
-        with open(files[0], "r") as f:
-            data = json.load(f)
+        # Collect the most recent `limit` records, which may span several files
+        chunks: List[List[Dict[str, Any]]] = []
+        remaining = limit
+        for filename in files:
+            if remaining <= 0:
+                break
+            serializer = _SERIALIZERS[filename.suffix[1:]]()
+            with open(filename, "rb") as f:
+                records = serializer.loads(f.read())
+            if len(records) > remaining:
+                records = records[-remaining:]
+            chunks.append(records)
+            remaining -= len(records)
         
-        return data[:limit]
+        return [record for records in reversed(chunks) for record in records]
+
+
+_BACKENDS: Dict[str, Type[StorageBackend]] = {
+    "s3": S3Storage,
+    "postgres": PostgreSQLStorage,
+    "postgresql": PostgreSQLStorage,
+    "mongodb": MongoDBStorage,
+    "file": FileStorage,
+}
+
+# Live backend instances by (backend name, id(config)); entries go away with
+# their backend, and the identity check below guards against a reused id
+_INSTANCES: "weakref.WeakValueDictionary[Tuple[str, int], StorageBackend]" = (
+    weakref.WeakValueDictionary()
+)
 
 
 def get_storage_backend(backend: str, config: StorageConfig) -> StorageBackend:
-    """Factory function to get storage backend."""
-    backends = {
-        "s3": S3Storage,
-        "postgres": PostgreSQLStorage,
-        "postgresql": PostgreSQLStorage,
-        "mongodb": MongoDBStorage,
-        "file": FileStorage,
-    }
+    """Factory function to get storage backend.
     
-    backend_class = backends.get(backend.lower())
-    if not backend_class:
-        raise ValueError(f"Unknown storage backend: {backend}")
+    Repeated calls with the same config object return the same instance
+    while it is still in use.
+    """
+    name = backend.lower()
+    key = (name, id(config))
+    instance = _INSTANCES.get(key)
+    if instance is not None and instance.config is config:
+        return instance
     
-    return backend_class(config)
-
+    try:
+        backend_class = _BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {backend}") from None
+    
+    instance = _INSTANCES[key] = backend_class(config)
+    return instance
@@ -33,16 +33,25 @@ setup(
         "mlflow": ["mlflow>=2.8.0"],
         "feast": ["feast>=0.36.0"],
         "airflow": ["apache-airflow>=2.7.0"],
-        "s3": ["boto3>=1.28.0"],
-        "postgres": ["psycopg2-binary>=2.9.0"],
-        "mongodb": ["pymongo>=4.6.0"],
+        "s3": ["boto3>=1.28.0", "aioboto3>=12.0.0"],
+        "postgres": ["asyncpg>=0.29.0", "psycopg2-binary>=2.9.0"],
+        "mongodb": ["pymongo>=4.6.0", "motor>=3.3.0"],
+        "parquet": ["pyarrow>=14.0.0"],
+        "msgpack": ["ormsgpack>=1.4.0"],
+        "fast": ["orjson>=3.9.0", "uvloop>=0.19.0; sys_platform != 'win32'"],
         "all": [
             "mlflow>=2.8.0",
             "feast>=0.36.0",
             "apache-airflow>=2.7.0",
             "boto3>=1.28.0",
+            "aioboto3>=12.0.0",
+            "asyncpg>=0.29.0",
             "psycopg2-binary>=2.9.0",
             "pymongo>=4.6.0",
+            "motor>=3.3.0",
+            "pyarrow>=14.0.0",
+            "ormsgpack>=1.4.0",
+            "orjson>=3.9.0",
         ],
     },
     classifiers=[
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The package lives under src/python (see src/python/setup.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "python"))
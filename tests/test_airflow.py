@@ -0,0 +1,44 @@
+import sys
+import types
+
+import pytest
+
+from azw3.integrations.airflow import AirflowDAG
+
+
+class FakeDAG:
+    def __init__(self, dag_id, **kwargs):
+        self.dag_id = dag_id
+        self.kwargs = kwargs
+        self.tasks = []
+
+
+class FakeOperator:
+    def __init__(self, task_id, python_callable, dag):
+        self.python_callable = python_callable
+        dag.tasks.append(self)
+    
+    def __rshift__(self, other):
+        return other
+
+
+@pytest.fixture
+def fake_airflow(monkeypatch):
+    operators = types.ModuleType("airflow.operators")
+    python = types.SimpleNamespace(PythonOperator=FakeOperator)
+    monkeypatch.setitem(sys.modules, "airflow", types.SimpleNamespace(DAG=FakeDAG))
+    monkeypatch.setitem(sys.modules, "airflow.operators", operators)
+    monkeypatch.setitem(sys.modules, "airflow.operators.python", python)
+
+
+def test_dag_allows_one_active_run(fake_airflow):
+    dag = AirflowDAG(pipeline=object()).get_dag()
+    assert dag.kwargs["max_active_runs"] == 1
+
+
+def test_dags_with_the_same_id_use_their_own_pipeline(fake_airflow):
+    first = AirflowDAG(pipeline=object())
+    second = AirflowDAG(pipeline=object())
+    assert first.get_dag() is first.get_dag()
+    assert second.get_dag() is not first.get_dag()
+    assert all(task.python_callable.__self__ is second for task in second.get_dag().tasks)
@@ -0,0 +1,61 @@
+import os
+
+import yaml
+
+from azw3 import config as config_module
+from azw3.config import Config
+
+
+def write_config(path, bucket, mtime_ns):
+    path.write_text(f"storage:\n  backend: s3\n  bucket: {bucket}\n")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def count_parses(monkeypatch):
+    parses = []
+    load = yaml.load
+    
+    def counting_load(stream, Loader):
+        parses.append(stream)
+        return load(stream, Loader=Loader)
+    
+    monkeypatch.setattr(config_module.yaml, "load", counting_load)
+    return parses
+
+
+def test_from_file_parses_an_unchanged_file_once(tmp_path, monkeypatch):
+    parses = count_parses(monkeypatch)
+    path = tmp_path / "config.yaml"
+    write_config(path, "first", 1_000_000_000)
+    
+    assert Config.from_file(str(path)).storage.bucket == "first"
+    assert Config.from_file(str(path)).storage.bucket == "first"
+    assert len(parses) == 1
+
+
+def test_from_file_reparses_after_the_file_changes(tmp_path, monkeypatch):
+    parses = count_parses(monkeypatch)
+    path = tmp_path / "config.yaml"
+    write_config(path, "first", 1_000_000_000)
+    Config.from_file(str(path))
+    entries = len(config_module._yaml_cache)
+    
+    write_config(path, "second", 2_000_000_000)
+    assert Config.from_file(str(path)).storage.bucket == "second"
+    assert len(parses) == 2
+    # The stale entry is replaced, not kept beside the new one
+    assert len(config_module._yaml_cache) == entries
+    assert config_module._yaml_cache[str(path.resolve())][0] == 2_000_000_000
+
+
+def test_from_file_returns_independent_configs(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path, "first", 1_000_000_000)
+    
+    first = Config.from_file(str(path))
+    first.storage.bucket = "changed"
+    first.processing.bronze["retention_days"] = 1
+    second = Config.from_file(str(path))
+    assert second.storage.bucket == "first"
+    assert second.processing.bronze == {}
+    assert second is not first
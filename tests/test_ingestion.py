@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from azw3.ingestion import HistoricalIngestion, WebSocketIngestion
+
+
+class FakeBronze:
+    def __init__(self):
+        self.records = []
+    
+    async def store_many(self, records):
+        self.records.extend(records)
+
+
+class FakeChain(HistoricalIngestion):
+    """Historical ingestion against an in-memory chain of `head + 1` blocks."""
+    
+    def __init__(self, head, bronze):
+        super().__init__("http://rpc.invalid", 0, bronze, concurrency=64)
+        self.head = head
+        self.fetched = []
+        self.head_queries = 0
+    
+    async def _fetch_block(self, block_number):
+        self.fetched.append(block_number)
+        if block_number > self.head:
+            return None
+        return {
+            "number": hex(block_number),
+            "timestamp": hex(block_number),
+            "transactions": [{"hash": f"0x{block_number:x}"}],
+        }
+    
+    async def _fetch_block_number(self):
+        self.head_queries += 1
+        return self.head
+
+
+def test_polling_at_chain_head_only_fetches_new_blocks(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay: sleep(0.001))
+    bronze = FakeBronze()
+    source = FakeChain(10, bronze)
+    
+    async def run():
+        source._running = True
+        task = asyncio.create_task(source._ingest_blocks())
+        await sleep(0.05)
+        first_window = len(source.fetched)
+        source.head = 12
+        await sleep(0.05)
+        source._running = False
+        task.cancel()
+        return first_window
+    
+    first_window = asyncio.run(run())
+    assert first_window == 64
+    assert source.head_queries > 5
+    # After the first window, only the two new blocks were fetched
+    assert sorted(source.fetched[first_window:]) == [11, 12]
+    assert [record["block_number"] for record in bronze.records] == list(range(13))
+
+
+def test_websocket_messages_keep_wide_integers_exact():
+    source = WebSocketIngestion("ws://node.invalid", FakeBronze())
+    message = asyncio.run(source._parse_message('{"value": 100000000000000000000}'))
+    assert message["value"] == 10 ** 20
+
+
+class RefusingOnceBronze(FakeBronze):
+    """Bronze stub that refuses its first store_many, as a full backend does."""
+    
+    def __init__(self):
+        super().__init__()
+        self.refused = False
+    
+    async def store_many(self, records):
+        if not self.refused:
+            self.refused = True
+            raise RuntimeError("backlog full")
+        await super().store_many(records)
+
+
+def test_blocks_of_a_failed_store_are_stored_on_retry(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay: sleep(0.001))
+    bronze = RefusingOnceBronze()
+    source = FakeChain(5, bronze)
+    
+    async def run():
+        source._running = True
+        task = asyncio.create_task(source._ingest_blocks())
+        await sleep(0.05)
+        source._running = False
+        task.cancel()
+    
+    asyncio.run(run())
+    assert bronze.refused
+    assert [record["block_number"] for record in bronze.records] == list(range(6))
+
+
+def test_websocket_drain_keeps_a_refused_batch_until_stored(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(asyncio, "sleep", lambda delay: sleep(0.001))
+    bronze = RefusingOnceBronze()
+    source = WebSocketIngestion("ws://node.invalid", bronze, batch_size=5)
+    
+    async def run():
+        source._queue = asyncio.Queue()
+        source._running = True
+        for n in range(5):
+            source._queue.put_nowait({"n": n})
+        task = asyncio.create_task(source._drain())
+        await sleep(0.02)
+        for n in range(5, 8):
+            source._queue.put_nowait({"n": n})
+        await sleep(0.02)
+        source._running = False
+        task.cancel()
+    
+    asyncio.run(run())
+    assert bronze.refused
+    assert [message["n"] for message in bronze.records] == list(range(8))
+
+
+def test_websocket_stop_stores_held_and_queued_messages():
+    bronze = RefusingOnceBronze()
+    source = WebSocketIngestion("ws://node.invalid", bronze)
+    
+    async def run():
+        source._queue = asyncio.Queue()
+        source._held = [{"n": 0}, {"n": 1}]
+        source._queue.put_nowait({"n": 2})
+        with pytest.raises(RuntimeError):
+            await source.stop()
+        await source.stop()
+    
+    asyncio.run(run())
+    assert [message["n"] for message in bronze.records] == [0, 1, 2]
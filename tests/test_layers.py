@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from azw3.layers import BronzeLayer, GoldLayer, SilverLayer
+from test_storage import FlakyStorage
+
+
+class RefusingStorage(FlakyStorage):
+    """Backend whose write queue refuses batches while `failing` is set."""
+    
+    async def write_columns_nowait(self, layer, columns):
+        if self.failing:
+            raise RuntimeError("backlog full")
+        await super().write_columns_nowait(layer, columns)
+
+
+def test_bronze_buffer_is_bounded_while_storage_refuses():
+    async def run():
+        storage = RefusingStorage()
+        bronze = BronzeLayer(storage, {})
+        storage.failing = True
+        for index in range(20):
+            try:
+                await bronze.store_many([{"n": index * 100 + i} for i in range(100)])
+            except RuntimeError:
+                pass
+            assert bronze._buffer_len < bronze._buffer_size + 100
+        
+        storage.failing = False
+        await bronze.store_many([{"n": -1}])
+        await bronze.close()
+        return bronze, storage.written
+    
+    bronze, written = asyncio.run(run())
+    assert bronze._buffer_len == 0
+    assert len(written) == 1001
+
+
+def test_silver_close_retries_records_of_a_failed_write():
+    async def run():
+        storage = FlakyStorage()
+        silver = SilverLayer(storage, {})
+        storage.failing = True
+        await silver.store([{"n": i} for i in range(5)])
+        with pytest.raises(RuntimeError, match="5 records"):
+            await silver.close()
+        assert silver.get_status()["buffer_size"] == 5
+        
+        storage.failing = False
+        await silver.close()
+        return silver, storage.written
+    
+    silver, written = asyncio.run(run())
+    assert silver.get_status()["buffer_size"] == 0
+    assert written == [{"n": i} for i in range(5)]
+
+
+def test_bronze_buffer_pads_fields_absent_from_a_record():
+    bronze = BronzeLayer(FlakyStorage(), {})
+    bronze._append({"a": 1})
+    bronze._append({"b": 2})
+    bronze._append({"a": 3, "b": 4})
+    assert bronze._buffer == {"a": [1, None, 3], "b": [None, 2, 4]}
+    assert bronze._buffer_len == 3
+
+
+def test_bronze_flush_cancelled_on_a_full_write_queue_keeps_the_buffer():
+    class BlockedStorage(FlakyStorage):
+        async def write_columns_nowait(self, layer, columns):
+            await asyncio.Event().wait()
+    
+    async def run():
+        bronze = BronzeLayer(BlockedStorage(), {})
+        await bronze.store_many([{"n": n} for n in range(3)])
+        task = asyncio.create_task(bronze._flush())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return bronze
+    
+    bronze = asyncio.run(run())
+    assert bronze._buffer["n"] == [0, 1, 2]
+    assert bronze._buffer_len == 3
+
+
+def test_gold_features_match_per_record_utc_extraction():
+    timestamps = [1700000000, 1704067199, 1704067200, 86400 * 3 + 1]
+    records = [
+        {"timestamp": ts, "value": "5", "gas_used": 21000, "gas_price": 3}
+        for ts in timestamps
+    ]
+    features = asyncio.run(GoldLayer(FlakyStorage(), {}).process(records))
+    
+    for ts, feature in zip(timestamps, features):
+        moment = datetime.fromtimestamp(ts, tz=timezone.utc)
+        assert feature["hour_of_day"] == moment.hour
+        assert feature["day_of_week"] == moment.weekday()
+        assert type(feature["hour_of_day"]) is int
+        assert type(feature["day_of_week"]) is int
+        assert feature["transaction_value"] == 5.0
+        assert feature["gas_cost"] == 63000.0
+        assert feature["gas_price_avg"] == 3.0
+        assert feature["user_activity_score"] == 0.5
+        assert all(type(feature[name]) is float for name in (
+            "transaction_value", "gas_cost", "gas_price_avg", "user_activity_score"
+        ))
+    assert features[0]["_gold_metadata"]["layer"] == "gold"
+    assert features[0]["_gold_metadata"] is features[-1]["_gold_metadata"]
+
+
+def test_gold_features_of_records_without_timestamp_or_amounts():
+    records = [{"timestamp": None}, {"timestamp": 0}, {}, {"value": None, "gas_price": None}]
+    features = asyncio.run(GoldLayer(FlakyStorage(), {}).process(records))
+    
+    assert len(features) == 4
+    for feature in features:
+        assert feature["hour_of_day"] is None
+        assert feature["day_of_week"] is None
+        assert feature["transaction_value"] == 0.0
+        assert feature["gas_cost"] == 0.0
+
+
+def test_gold_process_of_an_empty_batch():
+    assert asyncio.run(GoldLayer(FlakyStorage(), {}).process([])) == []
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from azw3.config import Config
+from azw3.pipeline import Pipeline
+
+
+def make_pipeline(tmp_path):
+    config = Config.model_validate(
+        {"storage": {"backend": "file", "connection_string": str(tmp_path)}}
+    )
+    return Pipeline(config)
+
+
+def test_stop_flushes_and_closes_everything_when_bronze_fails(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    closed = []
+    
+    async def failing_close():
+        raise RuntimeError("1 background writes failed")
+    
+    async def close_storage():
+        closed.append(True)
+    
+    pipeline.bronze.close = failing_close
+    pipeline.storage.close = close_storage
+    
+    async def run():
+        await pipeline.silver.store([{"n": i} for i in range(3)])
+        await pipeline.gold.store([{"n": i} for i in range(2)])
+        with pytest.raises(RuntimeError, match="background writes failed"):
+            await pipeline.stop()
+    
+    asyncio.run(run())
+    assert pipeline.silver.get_status()["buffer_size"] == 0
+    assert pipeline.gold.get_status()["buffer_size"] == 0
+    assert closed == [True]
+
+
+def test_stage_runs_with_zero_concurrency(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    batches = [[{"n": 1}], [{"n": 2}]]
+    stored = []
+    
+    async def fetch():
+        if not batches:
+            pipeline._running = False
+            return None
+        return batches.pop(0)
+    
+    async def transform(batch):
+        return batch
+    
+    async def store(batch):
+        stored.extend(batch)
+    
+    async def run():
+        pipeline._running = True
+        await pipeline._run_stage("test", fetch, transform, store, concurrency=0)
+    
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert stored == [{"n": 1}, {"n": 2}]
+
+
+def test_process_bronze_batch_closes_storage_when_processing_fails(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    closed = []
+    
+    async def close_storage():
+        closed.append(True)
+    
+    async def read(limit):
+        return [{"n": 1}]
+    
+    async def failing_process(raw_data):
+        raise ValueError("bad record")
+    
+    pipeline.storage.close = close_storage
+    pipeline.bronze.get_next_batch = read
+    pipeline.silver.process = failing_process
+    
+    with pytest.raises(ValueError):
+        asyncio.run(pipeline.process_bronze_batch(10))
+    assert closed == [True]
+
+
+def fresh_status(pipeline):
+    return {
+        "running": pipeline._running,
+        "stack": pipeline.stack,
+        "ingestion": pipeline.ingestion.get_status(),
+        "bronze": pipeline.bronze.get_status(),
+        "silver": pipeline.silver.get_status(),
+        "gold": pipeline.gold.get_status(),
+    }
+
+
+def test_cached_status_follows_every_layer_and_source_change(tmp_path):
+    config = Config.model_validate({
+        "storage": {"backend": "file", "connection_string": str(tmp_path)},
+        "ingestion": {"sources": [{"type": "historical", "endpoint": "http://rpc.invalid"}]},
+    })
+    pipeline = Pipeline(config)
+    
+    async def failing_write(layer, data):
+        raise ConnectionError("storage down")
+    
+    async def run():
+        steps = [
+            lambda: pipeline.bronze.store_many([{"n": 1}, {"b": 2}]),
+            lambda: pipeline.bronze._flush(),
+            lambda: pipeline.silver.store([{"n": 1}]),
+            lambda: pipeline.silver.close(),
+            lambda: pipeline.gold.store([{"n": 1}, {"n": 2}]),
+            lambda: pipeline.gold.close(),
+        ]
+        assert pipeline.get_status() == fresh_status(pipeline)
+        for step in steps:
+            await step()
+            assert pipeline.get_status() == fresh_status(pipeline)
+        
+        # A failed background write re-buffers its records
+        pipeline.silver._storage_write = failing_write
+        await pipeline.silver.store([{"n": 2}])
+        await pipeline.silver._flush()
+        await asyncio.gather(*pipeline.silver._pending_writes)
+        assert pipeline.get_status()["silver"]["buffer_size"] == 1
+        assert pipeline.get_status() == fresh_status(pipeline)
+        
+        pipeline.ingestion.sources[0]._running = True
+        assert pipeline.get_status()["ingestion"]["active"] == 1
+        pipeline._running = True
+        assert pipeline.get_status() == fresh_status(pipeline)
+    
+    asyncio.run(run())
+
+
+def test_get_status_returns_a_copy(tmp_path):
+    pipeline = make_pipeline(tmp_path)
+    pipeline.get_status()["bronze"] = None
+    assert pipeline.get_status()["bronze"] == pipeline.bronze.get_status()
@@ -0,0 +1,285 @@
+import asyncio
+import sys
+import types
+
+import pytest
+
+from azw3.config import StorageConfig
+from azw3.storage import (
+    FileStorage,
+    JsonSerializer,
+    MsgpackSerializer,
+    ParquetSerializer,
+    PostgreSQLStorage,
+    S3Storage,
+    StorageBackend,
+    _ObjectKeys,
+    _concat_columns,
+)
+
+
+class FlakyStorage(StorageBackend):
+    """In-memory backend whose writes fail while `failing` is set."""
+    
+    _RETRY_INITIAL_DELAY = 0.01
+    _RETRY_MAX_DELAY = 0.02
+    
+    def __init__(self):
+        self.failing = False
+        self.written = []
+    
+    async def write(self, layer, data):
+        if self.failing:
+            raise ConnectionError("storage down")
+        self.written.extend(data)
+    
+    async def read(self, layer, limit=100):
+        return self.written[-limit:]
+
+
+def test_background_writer_retries_failed_batches_after_recovery():
+    async def run():
+        storage = FlakyStorage()
+        storage.failing = True
+        for index in range(StorageBackend._WRITE_QUEUE_SIZE):
+            await storage.write_columns_nowait("bronze", {"n": [index]})
+        while len(storage._failed_writes or []) < StorageBackend._WRITE_QUEUE_SIZE:
+            await asyncio.sleep(0.01)
+        with pytest.raises(RuntimeError):
+            await storage.write_columns_nowait("bronze", {"n": [-1]})
+        
+        storage.failing = False
+        for _ in range(100):
+            if not storage._failed_writes:
+                break
+            await asyncio.sleep(0.01)
+        assert storage._failed_writes == []
+        
+        await storage.write_columns_nowait("bronze", {"n": [64]})
+        await storage.drain()
+        return storage.written
+    
+    written = asyncio.run(run())
+    assert sorted(record["n"] for record in written) == list(range(65))
+
+
+def test_drain_raises_while_writes_keep_failing():
+    async def run():
+        storage = FlakyStorage()
+        storage.failing = True
+        await storage.write_nowait("silver", [{"n": 1}])
+        with pytest.raises(RuntimeError):
+            await storage.drain()
+        
+        storage.failing = False
+        await storage.drain()
+        return storage.written
+    
+    assert asyncio.run(run()) == [{"n": 1}]
+
+
+def test_concurrent_first_postgres_writes_share_one_pool(monkeypatch):
+    created = []
+    
+    async def create_pool(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        created.append(object())
+        return created[-1]
+    
+    monkeypatch.setitem(sys.modules, "asyncpg", types.SimpleNamespace(create_pool=create_pool))
+    storage = PostgreSQLStorage(StorageConfig(backend="postgres"))
+    
+    async def run():
+        return await asyncio.gather(*(storage._ensure_pool() for _ in range(4)))
+    
+    pools = asyncio.run(run())
+    assert len(created) == 1
+    assert all(pool is created[0] for pool in pools)
+
+
+class FakeS3Client:
+    """Async stand-in for an aioboto3 S3 client that records its calls."""
+    
+    def __init__(self, fail_put=False):
+        self.fail_put = fail_put
+        self.calls = []
+        self.exited = False
+    
+    async def __aenter__(self):
+        await asyncio.sleep(0.01)
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.exited = True
+    
+    async def put_object(self, **kwargs):
+        self.calls.append(("put_object", kwargs))
+        if self.fail_put:
+            raise ConnectionError("S3 down")
+    
+    async def create_multipart_upload(self, **kwargs):
+        self.calls.append(("create_multipart_upload", kwargs))
+        return {"UploadId": "upload-1"}
+    
+    async def upload_part(self, **kwargs):
+        self.calls.append(("upload_part", {**kwargs, "Body": bytes(kwargs["Body"])}))
+        return {"ETag": f"etag-{kwargs['PartNumber']}"}
+    
+    async def complete_multipart_upload(self, **kwargs):
+        self.calls.append(("complete_multipart_upload", kwargs))
+    
+    async def abort_multipart_upload(self, **kwargs):
+        self.calls.append(("abort_multipart_upload", kwargs))
+
+
+def install_fake_aioboto3(monkeypatch, **kwargs):
+    clients = []
+    
+    def client(*args, **client_kwargs):
+        clients.append(FakeS3Client(**kwargs))
+        return clients[-1]
+    
+    session = types.SimpleNamespace(client=client)
+    monkeypatch.setitem(sys.modules, "aioboto3", types.SimpleNamespace(Session=lambda: session))
+    return clients
+
+
+def test_concurrent_first_s3_flushes_share_one_client(monkeypatch):
+    clients = install_fake_aioboto3(monkeypatch)
+    storage = S3Storage(StorageConfig(backend="s3", bucket="bucket"))
+    
+    async def run():
+        await asyncio.gather(storage._get_async_client(), storage._get_async_client())
+        await storage.close()
+    
+    asyncio.run(run())
+    assert len(clients) == 1
+    assert clients[0].exited
+
+
+def test_s3_close_releases_client_when_flush_fails(monkeypatch):
+    clients = install_fake_aioboto3(monkeypatch, fail_put=True)
+    storage = S3Storage(StorageConfig(backend="s3", bucket="bucket"))
+    
+    async def run():
+        await storage.write("gold", [{"n": 1}])
+        with pytest.raises(ConnectionError):
+            await storage.close()
+    
+    asyncio.run(run())
+    assert clients[0].exited
+    assert storage._async_client is None
+
+
+class SmallPartS3Storage(S3Storage):
+    """S3 backend with 10-byte parts, so multipart splitting is easy to follow."""
+    
+    _MULTIPART_THRESHOLD = 10
+
+
+def upload(chunks, client=None):
+    storage = SmallPartS3Storage(StorageConfig(backend="s3", bucket="bucket"))
+    client = client or FakeS3Client()
+    asyncio.run(storage._upload_chunks(client, "gold/key.json", iter(chunks)))
+    return storage, client
+
+
+def test_upload_chunks_sends_small_batches_as_one_object():
+    storage, client = upload([b"[1,", b"2]"])
+    assert [name for name, _ in client.calls] == ["put_object"]
+    assert client.calls[0][1]["Body"] == b"[1,2]"
+    assert len(storage._buf_pool) == 1
+
+
+def test_upload_chunks_splits_large_batches_into_parts():
+    storage, client = upload([b"abcdefg", b"hijklmnopqrstuvw", b"xyz"])
+    names = [name for name, _ in client.calls]
+    assert names == [
+        "create_multipart_upload",
+        "upload_part",
+        "upload_part",
+        "upload_part",
+        "complete_multipart_upload",
+    ]
+    parts = [kwargs for name, kwargs in client.calls if name == "upload_part"]
+    assert [part["Body"] for part in parts] == [b"abcdefghij", b"klmnopqrst", b"uvwxyz"]
+    assert [part["PartNumber"] for part in parts] == [1, 2, 3]
+    assert client.calls[-1][1]["MultipartUpload"]["Parts"] == [
+        {"ETag": f"etag-{number}", "PartNumber": number} for number in (1, 2, 3)
+    ]
+    assert len(storage._buf_pool[0]) == SmallPartS3Storage._MULTIPART_THRESHOLD
+
+
+def test_upload_chunks_never_sends_an_empty_last_part():
+    _, client = upload([b"0123456789abcdefghij"])
+    parts = [kwargs["Body"] for name, kwargs in client.calls if name == "upload_part"]
+    assert parts == [b"0123456789", b"abcdefghij"]
+
+
+def test_upload_chunks_aborts_the_multipart_upload_on_failure():
+    class FailingClient(FakeS3Client):
+        async def complete_multipart_upload(self, **kwargs):
+            raise ConnectionError("S3 down")
+    
+    client = FailingClient()
+    with pytest.raises(ConnectionError):
+        upload([b"0123456789abcdef"], client)
+    assert client.calls[-1] == (
+        "abort_multipart_upload",
+        {"Bucket": "bucket", "Key": "gold/key.json", "UploadId": "upload-1"},
+    )
+
+
+def test_concat_columns_pads_missing_columns_with_none():
+    merged = _concat_columns([
+        {"a": [1, 2]},
+        {"b": ["x"]},
+        {"a": [3], "b": ["y"]},
+    ])
+    assert merged == {"a": [1, 2, None, 3], "b": [None, None, "x", "y"]}
+
+
+WIDE = 10 ** 20
+
+
+def test_json_serializer_round_trips_wide_integers():
+    serializer = JsonSerializer()
+    records = [{"value": WIDE, "gas": 21000}]
+    assert serializer.loads(serializer.dumps(records)) == records
+    assert serializer.loads(b"".join(serializer.iter_dumps(records))) == records
+
+
+def test_msgpack_serializer_stores_wide_integers_as_strings():
+    pytest.importorskip("ormsgpack")
+    serializer = MsgpackSerializer()
+    body = serializer.dumps([{"value": WIDE, "gas": 21000}])
+    assert serializer.loads(body) == [{"value": str(WIDE), "gas": 21000}]
+
+
+def test_parquet_serializer_stores_wide_integer_columns_as_strings():
+    pytest.importorskip("pyarrow")
+    serializer = ParquetSerializer()
+    records = [{"value": WIDE, "gas": 21000}, {"value": 1, "gas": 5}]
+    expected = [{"value": str(WIDE), "gas": 21000}, {"value": "1", "gas": 5}]
+    assert serializer.loads(serializer.dumps(records)) == expected
+    columns = {"value": [WIDE, 1], "gas": [21000, 5]}
+    assert serializer.loads(serializer.dumps_columns(columns)) == expected
+
+
+def test_object_keys_of_instances_created_back_to_back_differ():
+    first, second = _ObjectKeys(), _ObjectKeys()
+    assert first.next("bronze", "json") != second.next("bronze", "json")
+
+
+def test_file_storages_on_one_directory_keep_every_write(tmp_path):
+    config = StorageConfig(backend="file", connection_string=str(tmp_path))
+    first, second = FileStorage(config), FileStorage(config)
+    
+    async def run():
+        await first.write("bronze", [{"n": 1}])
+        await second.write("bronze", [{"n": 2}])
+        return await first.read("bronze")
+    
+    records = asyncio.run(run())
+    assert sorted(record["n"] for record in records) == [1, 2]
+    assert len(list((tmp_path / "bronze").glob("**/*.json"))) == 2